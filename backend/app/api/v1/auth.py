@@ -1,6 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from datetime import datetime
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from typing import Any, Dict, Optional
+from cachetools import TTLCache
+import asyncio
+import hashlib
+import logging
+import time
 
 from app.core.database import get_database
 from app.core.security import (
@@ -9,6 +17,7 @@ from app.core.security import (
     create_access_token,
     create_refresh_token,
     get_current_user_id,
+    get_current_user_oid,
     verify_refresh_token,
 )
 from app.schemas.user import (
@@ -21,9 +30,56 @@ from app.schemas.user import (
     PasswordChange,
 )
 from app.models.user import UserInDB
+from app.services.cache_service import CacheService
+from app.utils.dates import utc_now
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+# Recently verified refresh tokens: {token digest: (user_id, user, token_version, jti)}
+_refresh_cache: TTLCache = TTLCache(maxsize=10_000, ttl=5)
+
+# Per-user token version, bumped on password change to invalidate cached tokens.
+# Entries outlive the 5s _refresh_cache entries they guard, so by the time one
+# expires no token cached under an older version is left to match it.
+_token_versions: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+
+
+def _token_digest(token: str) -> bytes:
+    """Hash a token into a compact cache key"""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def _revoked_key(jti: str) -> str:
+    """Redis key marking a refresh token as revoked"""
+    return f"token:revoked:{jti}"
+
+
+# Short-lived cache of user documents (without password_hash, which is always
+# read fresh) for back-to-back authenticated calls
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=2)
+
+
+async def _get_user(
+    user_id: str = Depends(get_current_user_id),
+    user_oid: ObjectId = Depends(get_current_user_oid),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> Dict[str, Any]:
+    """FastAPI dependency returning the current user's document, minus password_hash (cached for 2s)"""
+
+    user = _user_cache.get(user_id)
+    if user is None:
+        user = await db.users.find_one({"_id": user_oid}, {"password_hash": 0})
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        _user_cache[user_id] = user
+
+    return user
+
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
@@ -32,17 +88,19 @@ async def register(
 ):
     """Register a new user"""
 
-    # Check if email already exists
-    existing_user = await db.users.find_one({"email": user_data.email})
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
+    username = user_data.username.lower()
 
-    # Check if username already exists
-    existing_username = await db.users.find_one({"username": user_data.username.lower()})
-    if existing_username:
+    # Check if email or username already exists (single query)
+    existing_user = await db.users.find_one(
+        {"$or": [{"email": user_data.email}, {"username": username}]},
+        {"email": 1, "username": 1}
+    )
+    if existing_user:
+        if existing_user.get("email") == user_data.email:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already taken"
@@ -51,24 +109,34 @@ async def register(
     # Create new user
     user = UserInDB(
         email=user_data.email,
-        username=user_data.username.lower(),
-        password_hash=hash_password(user_data.password),
+        username=username,
+        password_hash=await asyncio.to_thread(hash_password, user_data.password),
         full_name=user_data.full_name,
     )
 
-    # Insert into database
-    result = await db.users.insert_one(user.model_dump(by_alias=True, exclude={"id"}))
-
-    # Fetch created user
-    created_user = await db.users.find_one({"_id": result.inserted_id})
+    # Insert into database; the unique indexes created in
+    # Database.create_indexes still guard against concurrent registrations
+    try:
+        result = await db.users.insert_one(user.model_dump(by_alias=True, exclude={"id"}))
+    except DuplicateKeyError as e:
+        key_pattern = (e.details or {}).get("keyPattern", {})
+        if "username" in key_pattern:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Username already taken"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
 
     return UserResponse(
-        id=str(created_user["_id"]),
-        email=created_user["email"],
-        username=created_user["username"],
-        full_name=created_user.get("full_name"),
-        created_at=created_user["created_at"],
-        is_active=created_user["is_active"]
+        id=str(result.inserted_id),
+        email=user.email,
+        username=user.username,
+        full_name=user.full_name,
+        created_at=user.created_at,
+        is_active=user.is_active
     )
 
 
@@ -88,7 +156,7 @@ async def login(
         )
 
     # Verify password
-    if not verify_password(credentials.password, user["password_hash"]):
+    if not await asyncio.to_thread(verify_password, credentials.password, user["password_hash"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -108,8 +176,11 @@ async def login(
         "username": user["username"]
     }
 
-    access_token = create_access_token(token_data)
-    refresh_token = create_refresh_token(token_data)
+    # Sign both tokens off the event loop
+    access_token, refresh_token = await asyncio.gather(
+        asyncio.to_thread(create_access_token, token_data),
+        asyncio.to_thread(create_refresh_token, token_data)
+    )
 
     return TokenResponse(
         access_token=access_token,
@@ -124,23 +195,55 @@ async def refresh_token(
 ):
     """Refresh access token using refresh token"""
 
-    # Verify refresh token
-    payload = verify_refresh_token(token_data.refresh_token)
-
-    user_id = payload.get("sub")
-    if not user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-
-    # Verify user still exists and is active
-    user = await db.users.find_one({"_id": user_id})
-    if not user or not user.get("is_active", True):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found or inactive"
+    # Reuse a recently verified token if the user's token version is unchanged
+    token_key = _token_digest(token_data.refresh_token)
+    cached = _refresh_cache.get(token_key)
+
+    if cached and cached[2] == _token_versions.get(cached[0], 0):
+        user_id, user, _, jti = cached
+    else:
+        # Verify refresh token. All secret comparisons happen inside
+        # verify_refresh_token (constant-time signature check in jwt.decode);
+        # only the already-verified payload is inspected below.
+        payload = verify_refresh_token(token_data.refresh_token)
+
+        user_id = payload.get("sub")
+        # A malformed subject in a correctly signed token is still unauthorized
+        if not user_id or not ObjectId.is_valid(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid token"
+            )
+        jti = payload.get("jti")
+
+        # Verify user still exists and is active
+        user = await db.users.find_one(
+            {"_id": ObjectId(user_id)},
+            {"email": 1, "username": 1, "is_active": 1}
         )
+        if not user or not user.get("is_active", True):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found or inactive"
+            )
+
+        _refresh_cache[token_key] = (user_id, user, _token_versions.get(user_id, 0), jti)
+
+    # Reject tokens revoked on logout (tokens issued before jti was added skip this)
+    if jti:
+        revoked = await CacheService.exists(_revoked_key(jti), on_error=None)
+        if revoked is None:
+            # Fail closed: without the denylist a revoked token can't be told apart
+            logger.error(f"Revocation check unavailable, refusing refresh for user {user_id}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Unable to verify token, please retry later"
+            )
+        if revoked:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked"
+            )
 
     # Create new tokens
     token_data = {
@@ -149,8 +252,11 @@ async def refresh_token(
         "username": user["username"]
     }
 
-    access_token = create_access_token(token_data)
-    new_refresh_token = create_refresh_token(token_data)
+    # Sign both tokens off the event loop
+    access_token, new_refresh_token = await asyncio.gather(
+        asyncio.to_thread(create_access_token, token_data),
+        asyncio.to_thread(create_refresh_token, token_data)
+    )
 
     return TokenResponse(
         access_token=access_token,
@@ -159,21 +265,9 @@ async def refresh_token(
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user(
-    user_id: str = Depends(get_current_user_id),
-    db: AsyncIOMotorDatabase = Depends(get_database)
-):
+async def get_current_user(user: Dict[str, Any] = Depends(_get_user)):
     """Get current user information"""
 
-    from bson import ObjectId
-
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
     return UserResponse(
         id=str(user["_id"]),
         email=user["email"],
@@ -188,19 +282,18 @@ async def get_current_user(
 async def update_user(
     user_update: UserUpdate,
     user_id: str = Depends(get_current_user_id),
+    user_oid: ObjectId = Depends(get_current_user_oid),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Update current user profile"""
 
-    from bson import ObjectId
-
     update_data = {}
     if user_update.full_name is not None:
         update_data["full_name"] = user_update.full_name
     if user_update.preferences is not None:
         update_data["preferences"] = user_update.preferences
 
-    update_data["updated_at"] = datetime.utcnow()
+    update_data["updated_at"] = utc_now()
 
     if not update_data:
         raise HTTPException(
@@ -208,14 +301,19 @@ async def update_user(
             detail="No fields to update"
         )
 
-    # Update user
-    await db.users.update_one(
-        {"_id": ObjectId(user_id)},
-        {"$set": update_data}
+    # Update user and fetch the updated document in one round trip
+    user = await db.users.find_one_and_update(
+        {"_id": user_oid},
+        {"$set": update_data},
+        return_document=ReturnDocument.AFTER
     )
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
 
-    # Fetch updated user
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    _user_cache.pop(user_id, None)
 
     return UserResponse(
         id=str(user["_id"]),
@@ -231,14 +329,14 @@ async def update_user(
 async def change_password(
     password_data: PasswordChange,
     user_id: str = Depends(get_current_user_id),
+    user_oid: ObjectId = Depends(get_current_user_oid),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Change user password"""
 
-    from bson import ObjectId
-
-    # Get user
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    # Read the hash from Mongo, never from the per-process user cache, so a
+    # password just changed through another worker can't still verify here
+    user = await db.users.find_one({"_id": user_oid}, {"password_hash": 1})
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -246,26 +344,55 @@ async def change_password(
         )
 
     # Verify current password
-    if not verify_password(password_data.current_password, user["password_hash"]):
+    if not await asyncio.to_thread(
+        verify_password, password_data.current_password, user["password_hash"]
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect current password"
         )
 
     # Update password
-    new_password_hash = hash_password(password_data.new_password)
+    new_password_hash = await asyncio.to_thread(hash_password, password_data.new_password)
     await db.users.update_one(
-        {"_id": ObjectId(user_id)},
+        {"_id": user_oid},
         {"$set": {
             "password_hash": new_password_hash,
-            "updated_at": datetime.utcnow()
+            "updated_at": utc_now()
         }}
     )
 
+    # Invalidate any cached user document and refresh tokens for this user
+    _user_cache.pop(user_id, None)
+    _token_versions[user_id] = _token_versions.get(user_id, 0) + 1
+
     return {"message": "Password updated successfully"}
 
 
 @router.post("/logout")
-async def logout(user_id: str = Depends(get_current_user_id)):
-    """Logout user (client should discard tokens)"""
+async def logout(
+    token_data: Optional[TokenRefresh] = None,
+    user_id: str = Depends(get_current_user_id)
+):
+    """Logout user, revoking the refresh token if one is provided"""
+
+    if token_data is not None:
+        try:
+            payload = verify_refresh_token(token_data.refresh_token)
+        except HTTPException:
+            # Expired or malformed tokens can't be used anyway; nothing to revoke
+            payload = {}
+        jti = payload.get("jti")
+
+        if payload.get("sub") == user_id and jti:
+            # Keep the denylist entry only as long as the token could be used
+            remaining_ttl = max(int(payload.get("exp", 0) - time.time()), 1)
+            if not await CacheService.set(_revoked_key(jti), 1, ttl=remaining_ttl):
+                logger.error(f"Failed to revoke refresh token for user {user_id}")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Unable to revoke refresh token, please retry logout"
+                )
+            _refresh_cache.pop(_token_digest(token_data.refresh_token), None)
+
     return {"message": "Successfully logged out"}
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
 from typing import List, Optional
 
-from app.schemas.watchlist import StockSearchResult
+from app.schemas.watchlist import StockSearchResult, STOCK_SEARCH_RESULTS_ADAPTER
 from app.services.stock_service import StockService
 from app.services.cache_service import CacheService
 from app.core.security import get_current_user_id
@@ -19,33 +20,20 @@ async def search_stocks(
     Results are cached for 5 minutes
     """
 
-    # Check cache first
-    cache_key = CacheService.make_search_key(q)
-    cached_results = await CacheService.get(cache_key)
-
-    if cached_results:
-        return cached_results
-
-    # Search stocks
-    results = await StockService.search_stock(q)
-
-    if not results:
-        return []
+    async def load_results():
+        results = await StockService.search_stock(q)
 
-    # Format results
-    formatted_results = [
-        StockSearchResult(
-            symbol=r["symbol"],
-            name=r["name"],
-            exchange=r["exchange"],
-            type=r["type"]
-        ) for r in results
-    ]
+        # Format results (validated and dumped as one list)
+        return STOCK_SEARCH_RESULTS_ADAPTER.dump_python(
+            STOCK_SEARCH_RESULTS_ADAPTER.validate_python(results)
+        )
 
-    # Cache results for 5 minutes
-    await CacheService.set(cache_key, [r.model_dump() for r in formatted_results], ttl=300)
+    # Cache results for 5 minutes; concurrent misses share a single lookup
+    cache_key = CacheService.make_search_key(q)
+    results = await CacheService.get_or_set(cache_key, load_results, ttl=300)
 
-    return formatted_results
+    # Cached results are already in StockSearchResult shape; skip re-validation
+    return ORJSONResponse(results)
 
 
 @router.get("/{symbol}/info")
@@ -58,15 +46,13 @@ async def get_stock_info(
     Results are cached for 5 minutes
     """
 
-    # Check cache first
+    # Cache for 5 minutes; concurrent misses share a single upstream fetch
     cache_key = CacheService.make_stock_key(symbol, "info")
-    cached_info = await CacheService.get(cache_key)
-
-    if cached_info:
-        return cached_info
-
-    # Fetch stock info
-    stock_info = await StockService.get_stock_info(symbol)
+    stock_info = await CacheService.get_or_set(
+        cache_key,
+        lambda: StockService.get_stock_info(symbol),
+        ttl=300
+    )
 
     if not stock_info:
         raise HTTPException(
@@ -74,9 +60,6 @@ async def get_stock_info(
             detail=f"Stock {symbol} not found"
         )
 
-    # Cache for 5 minutes
-    await CacheService.set(cache_key, stock_info, ttl=300)
-
     return stock_info
 
 
@@ -92,15 +75,17 @@ async def get_historical_data(
     Results are cached based on interval
     """
 
-    # Check cache first
-    cache_key = CacheService.make_stock_key(symbol, f"historical:{period}:{interval}")
-    cached_data = await CacheService.get(cache_key)
-
-    if cached_data:
-        return cached_data
+    # Cache with appropriate TTL based on interval
+    ttl = 60  # 1 minute for intraday
+    if interval in ["1d", "5d", "1wk", "1mo", "3mo"]:
+        ttl = 300  # 5 minutes for daily+
 
-    # Fetch historical data
-    historical_data = await StockService.get_historical_data(symbol, period, interval)
+    cache_key = CacheService.make_stock_key(symbol, f"historical:{period}:{interval}")
+    historical_data = await CacheService.get_or_set(
+        cache_key,
+        lambda: StockService.get_historical_data(symbol, period, interval),
+        ttl=ttl
+    )
 
     if not historical_data:
         raise HTTPException(
@@ -108,13 +93,6 @@ async def get_historical_data(
             detail=f"No historical data found for {symbol}"
         )
 
-    # Cache with appropriate TTL based on interval
-    ttl = 60  # 1 minute for intraday
-    if interval in ["1d", "5d", "1wk", "1mo", "3mo"]:
-        ttl = 300  # 5 minutes for daily+
-
-    await CacheService.set(cache_key, historical_data, ttl=ttl)
-
     return historical_data
 
 
@@ -123,9 +101,29 @@ async def validate_stock_symbol(
     symbol: str,
     user_id: str = Depends(get_current_user_id)
 ):
-    """Validate if a stock symbol exists"""
+    """
+    Validate if a stock symbol exists
+    Valid symbols are cached for 1 hour, invalid ones for 10 minutes;
+    returns 503 (uncached) if upstream cannot be reached
+    """
+
+    # CacheService keeps a process-local copy in front of Redis
+    cache_key = CacheService.make_stock_key(symbol, "valid")
+    cached = await CacheService.get(cache_key)
+
+    if cached is not None:
+        is_valid = cached["valid"]
+    else:
+        is_valid = await StockService.validate_symbol(symbol)
+
+        # Upstream failure says nothing about the symbol; don't cache it
+        if is_valid is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Unable to validate {symbol} right now, please retry later"
+            )
 
-    is_valid = await StockService.validate_symbol(symbol)
+        await CacheService.set(cache_key, {"valid": is_valid}, ttl=3600 if is_valid else 600)
 
     return {
         "symbol": symbol,
@@ -1,26 +1,114 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status, Form
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
 from bson import ObjectId
 from datetime import datetime
-from typing import Optional
+from typing import BinaryIO, List, Optional, Tuple
 import pandas as pd
-import io
+import asyncio
+import functools
 import logging
 
 from app.core.database import get_database
-from app.core.security import get_current_user_id
+from app.core.security import get_current_user_oid
 from app.models.watchlist import Watchlist, Stock
 from app.schemas.watchlist import WatchlistResponse, StockResponse
+from app.services.stock_service import StockService
+from app.utils.dates import utc_now
 
 router = APIRouter(prefix="/upload", tags=["Upload"])
 logger = logging.getLogger(__name__)
 
+# Accepted column names (after strip/lower normalization)
+_SYMBOL_COLUMNS = ('symbol', 'symbols', 'stock', 'stocks', 'ticker', 'tickers', 'code')
+_NAME_COLUMNS = ('name', 'company', 'company_name', 'stock_name')
+
+
+def _pick_column(df: pd.DataFrame, candidates: Tuple[str, ...]) -> Optional[str]:
+    """Return the first candidate present in the (normalized) columns, if any"""
+    columns = set(df.columns)
+    return next((c for c in candidates if c in columns), None)
+
+
+async def _reject_invalid_symbols(stocks: List[Stock]):
+    """Raise a 400 listing any symbols that upstream reports as invalid"""
+    validity = await StockService.validate_symbols([s.symbol for s in stocks])
+    # Symbols that could not be checked (None) are let through
+    invalid = [symbol for symbol, is_valid in validity.items() if is_valid is False]
+
+    if invalid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid stock symbols in Excel file: {', '.join(invalid)}"
+        )
+
+
+def _read_upload(source: BinaryIO, filename: str) -> pd.DataFrame:
+    """
+    Parse an uploaded CSV/Excel file, decoding only the symbol and name columns
+
+    The file object is read in place (no copy into memory). The header row is
+    read first so that the full read can pass usecols and skip every column
+    the importer does not use.
+    """
+    if filename.endswith('.csv'):
+        read = pd.read_csv
+    else:
+        engine = 'xlrd' if filename.endswith('.xls') else 'openpyxl'
+        read = functools.partial(pd.read_excel, engine=engine)
+
+    # Read only the header row to pick the columns we need
+    source.seek(0)
+    header = read(source, nrows=0).columns
+    normalized = {c: str(c).strip().lower() for c in header}
+
+    source.seek(0)
+    if not any(n in _SYMBOL_COLUMNS for n in normalized.values()):
+        # No symbol column; a single row is enough for the caller to report it
+        return read(source, nrows=1)
+
+    usecols = [c for c, n in normalized.items() if n in _SYMBOL_COLUMNS or n in _NAME_COLUMNS]
+    return read(source, usecols=usecols, dtype=str)
+
+
+def _extract_stocks(
+    df: pd.DataFrame,
+    symbol_column: str,
+    name_column: Optional[str],
+    added_at: datetime
+) -> List[Stock]:
+    """
+    Build Stock objects from the symbol/name columns using vectorized string ops
+
+    Empty symbols are dropped and symbols without an exchange suffix default to NSE.
+    """
+    symbols = df[symbol_column].astype(str).str.strip()
+
+    # Skip empty symbols
+    keep = ~symbols.str.lower().isin(['nan', 'none', ''])
+    symbols = symbols[keep]
+
+    # Ensure symbol has exchange suffix (default to NSE)
+    symbols = symbols.where(symbols.str.endswith(('.NS', '.BO')), symbols + '.NS')
+
+    # Get names if available
+    if name_column:
+        names = df[name_column][keep]
+        names = names.astype(str).str.strip().where(names.notna(), None).tolist()
+    else:
+        names = [None] * len(symbols)
+
+    return [
+        Stock(symbol=symbol, name=name, added_at=added_at)
+        for symbol, name in zip(symbols.tolist(), names)
+    ]
+
 
 @router.post("/excel", response_model=WatchlistResponse, status_code=status.HTTP_201_CREATED)
 async def upload_excel_watchlist(
     file: UploadFile = File(..., description="Excel file with stock symbols"),
     watchlist_name: Optional[str] = Form(None, description="Name for the watchlist"),
-    user_id: str = Depends(get_current_user_id),
+    user_oid: ObjectId = Depends(get_current_user_oid),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """
@@ -45,14 +133,8 @@ async def upload_excel_watchlist(
         )
 
     try:
-        # Read file content
-        content = await file.read()
-
-        # Parse based on file type
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(content))
-        else:
-            df = pd.read_excel(io.BytesIO(content))
+        # Parse the spooled upload directly, off the event loop
+        df = await asyncio.to_thread(_read_upload, file.file, file.filename)
 
         # Check if dataframe is empty
         if df.empty:
@@ -61,18 +143,11 @@ async def upload_excel_watchlist(
                 detail="Excel file is empty"
             )
 
-        # Find symbol column (case-insensitive)
-        symbol_column = None
-        name_column = None
-
         # Normalize column names
         df.columns = df.columns.str.strip().str.lower()
 
-        # Find symbol column
-        for col in ['symbol', 'symbols', 'stock', 'stocks', 'ticker', 'tickers', 'code']:
-            if col in df.columns:
-                symbol_column = col
-                break
+        # Find symbol column (case-insensitive)
+        symbol_column = _pick_column(df, _SYMBOL_COLUMNS)
 
         if not symbol_column:
             raise HTTPException(
@@ -81,30 +156,11 @@ async def upload_excel_watchlist(
             )
 
         # Find name column (optional)
-        for col in ['name', 'company', 'company_name', 'stock_name']:
-            if col in df.columns:
-                name_column = col
-                break
-
-        # Extract stocks
-        stocks = []
-        for _, row in df.iterrows():
-            symbol = str(row[symbol_column]).strip()
-
-            # Skip empty symbols
-            if not symbol or symbol.lower() in ['nan', 'none', '']:
-                continue
-
-            # Get name if available
-            stock_name = None
-            if name_column and pd.notna(row[name_column]):
-                stock_name = str(row[name_column]).strip()
+        name_column = _pick_column(df, _NAME_COLUMNS)
 
-            # Ensure symbol has exchange suffix
-            if not symbol.endswith('.NS') and not symbol.endswith('.BO'):
-                symbol = f"{symbol}.NS"  # Default to NSE
-
-            stocks.append(Stock(symbol=symbol, name=stock_name))
+        # Extract stocks; one timestamp covers the watchlist and its stocks
+        now = utc_now()
+        stocks = _extract_stocks(df, symbol_column, name_column, now)
 
         if not stocks:
             raise HTTPException(
@@ -112,16 +168,21 @@ async def upload_excel_watchlist(
                 detail="No valid stock symbols found in Excel file"
             )
 
+        # Validate all symbols (batched upstream) before creating the watchlist
+        await _reject_invalid_symbols(stocks)
+
         # Create watchlist name
         if not watchlist_name:
             watchlist_name = f"Imported from {file.filename}"
 
         # Create watchlist
         watchlist = Watchlist(
-            user_id=ObjectId(user_id),
+            user_id=user_oid,
             name=watchlist_name,
             description=f"Imported from Excel file: {file.filename}",
-            stocks=stocks
+            stocks=stocks,
+            created_at=now,
+            updated_at=now
         )
 
         # Insert into database
@@ -129,28 +190,27 @@ async def upload_excel_watchlist(
             watchlist.model_dump(by_alias=True, exclude={"id"})
         )
 
-        # Fetch created watchlist
-        created_watchlist = await db.watchlists.find_one({"_id": result.inserted_id})
-
         logger.info(f"Created watchlist from Excel: {watchlist_name} with {len(stocks)} stocks")
 
         return WatchlistResponse(
-            id=str(created_watchlist["_id"]),
-            user_id=str(created_watchlist["user_id"]),
-            name=created_watchlist["name"],
-            description=created_watchlist.get("description"),
+            id=str(result.inserted_id),
+            user_id=str(watchlist.user_id),
+            name=watchlist.name,
+            description=watchlist.description,
             stocks=[
                 StockResponse(
-                    symbol=s["symbol"],
-                    name=s.get("name"),
-                    added_at=s["added_at"]
-                ) for s in created_watchlist.get("stocks", [])
+                    symbol=s.symbol,
+                    name=s.name,
+                    added_at=s.added_at
+                ) for s in watchlist.stocks
             ],
-            created_at=created_watchlist["created_at"],
-            updated_at=created_watchlist["updated_at"],
-            is_default=created_watchlist.get("is_default", False)
+            created_at=watchlist.created_at,
+            updated_at=watchlist.updated_at,
+            is_default=watchlist.is_default
         )
 
+    except HTTPException:
+        raise
     except pd.errors.EmptyDataError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -168,25 +228,13 @@ async def upload_excel_watchlist(
 async def append_excel_to_watchlist(
     watchlist_id: str,
     file: UploadFile = File(..., description="Excel file with stock symbols"),
-    user_id: str = Depends(get_current_user_id),
+    user_oid: ObjectId = Depends(get_current_user_oid),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """
     Append stocks from Excel file to an existing watchlist
     """
 
-    # Check if watchlist exists and belongs to user
-    watchlist = await db.watchlists.find_one({
-        "_id": ObjectId(watchlist_id),
-        "user_id": ObjectId(user_id)
-    })
-
-    if not watchlist:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Watchlist not found"
-        )
-
     # Validate file type
     if not file.filename.endswith(('.xlsx', '.xls', '.csv')):
         raise HTTPException(
@@ -195,25 +243,13 @@ async def append_excel_to_watchlist(
         )
 
     try:
-        # Read file content
-        content = await file.read()
-
-        # Parse based on file type
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(content))
-        else:
-            df = pd.read_excel(io.BytesIO(content))
+        # Parse the spooled upload directly, off the event loop
+        df = await asyncio.to_thread(_read_upload, file.file, file.filename)
 
         # Find symbol column
         df.columns = df.columns.str.strip().str.lower()
 
-        symbol_column = None
-        name_column = None
-
-        for col in ['symbol', 'symbols', 'stock', 'stocks', 'ticker', 'tickers', 'code']:
-            if col in df.columns:
-                symbol_column = col
-                break
+        symbol_column = _pick_column(df, _SYMBOL_COLUMNS)
 
         if not symbol_column:
             raise HTTPException(
@@ -221,34 +257,10 @@ async def append_excel_to_watchlist(
                 detail="Excel file must have a column named 'symbol', 'stock', or 'ticker'"
             )
 
-        for col in ['name', 'company', 'company_name', 'stock_name']:
-            if col in df.columns:
-                name_column = col
-                break
-
-        # Get existing stock symbols to avoid duplicates
-        existing_symbols = {s["symbol"] for s in watchlist.get("stocks", [])}
-
-        # Extract new stocks
-        new_stocks = []
-        for _, row in df.iterrows():
-            symbol = str(row[symbol_column]).strip()
+        name_column = _pick_column(df, _NAME_COLUMNS)
 
-            if not symbol or symbol.lower() in ['nan', 'none', '']:
-                continue
-
-            stock_name = None
-            if name_column and pd.notna(row[name_column]):
-                stock_name = str(row[name_column]).strip()
-
-            if not symbol.endswith('.NS') and not symbol.endswith('.BO'):
-                symbol = f"{symbol}.NS"
-
-            # Skip if already exists
-            if symbol in existing_symbols:
-                continue
-
-            new_stocks.append(Stock(symbol=symbol, name=stock_name))
+        # Extract stocks; duplicates of existing ones are skipped server-side
+        new_stocks = _extract_stocks(df, symbol_column, name_column, utc_now())
 
         if not new_stocks:
             raise HTTPException(
@@ -256,19 +268,60 @@ async def append_excel_to_watchlist(
                 detail="No new valid stock symbols found in Excel file (all may already exist)"
             )
 
-        # Append stocks to watchlist
-        await db.watchlists.update_one(
-            {"_id": ObjectId(watchlist_id)},
+        # Check ownership first so a bad watchlist id never costs upstream calls
+        watchlist_oid = ObjectId(watchlist_id)
+        exists = await db.watchlists.find_one(
+            {"_id": watchlist_oid, "user_id": user_oid},
+            {"_id": 1}
+        )
+        if not exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Watchlist not found"
+            )
+
+        # Validate all symbols (batched upstream) before touching the watchlist
+        await _reject_invalid_symbols(new_stocks)
+
+        new_symbols = [s.symbol for s in new_stocks]
+
+        # Append only stocks whose symbol is not already in the watchlist. The
+        # filter requires at least one new symbol, so a miss means every symbol
+        # is already present (or the watchlist was deleted meanwhile).
+        updated_watchlist = await db.watchlists.find_one_and_update(
             {
-                "$push": {"stocks": {"$each": [s.model_dump() for s in new_stocks]}},
-                "$set": {"updated_at": datetime.utcnow()}
-            }
+                "_id": watchlist_oid,
+                "user_id": user_oid,
+                "stocks.symbol": {"$not": {"$all": new_symbols}}
+            },
+            [{
+                "$set": {
+                    "stocks": {
+                        "$concatArrays": [
+                            {"$ifNull": ["$stocks", []]},
+                            {
+                                "$filter": {
+                                    "input": {"$literal": [s.model_dump() for s in new_stocks]},
+                                    "cond": {
+                                        "$not": {"$in": ["$$this.symbol", {"$ifNull": ["$stocks.symbol", []]}]}
+                                    }
+                                }
+                            }
+                        ]
+                    },
+                    "updated_at": "$$NOW"
+                }
+            }],
+            return_document=ReturnDocument.AFTER
         )
 
-        # Fetch updated watchlist
-        updated_watchlist = await db.watchlists.find_one({"_id": ObjectId(watchlist_id)})
+        if not updated_watchlist:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No new valid stock symbols found in Excel file (all may already exist)"
+            )
 
-        logger.info(f"Appended {len(new_stocks)} stocks to watchlist {watchlist_id}")
+        logger.info(f"Appended stocks from Excel ({len(new_stocks)} candidates) to watchlist {watchlist_id}")
 
         return WatchlistResponse(
             id=str(updated_watchlist["_id"]),
@@ -287,6 +340,8 @@ async def append_excel_to_watchlist(
             is_default=updated_watchlist.get("is_default", False)
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error appending Excel to watchlist: {e}")
         raise HTTPException(
@@ -1,108 +1,176 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
 from bson import ObjectId
-from datetime import datetime
-from typing import List
+from pymongo import ReturnDocument, UpdateOne
+from typing import Any, AsyncIterator, Dict, List
+import orjson
 
-from app.core.database import get_database
-from app.core.security import get_current_user_id
+from app.core.database import get_database, get_watchlists_collection
+from app.core.security import get_current_user_oid
 from app.schemas.watchlist import (
     WatchlistCreate,
     WatchlistUpdate,
     WatchlistResponse,
     StockAdd,
-    StockResponse,
+    StockBatchAdd,
     IndexWatchlistCreate
 )
 from app.models.watchlist import Watchlist, Stock
 from app.services.stock_service import StockService
+from app.utils.dates import utc_now
 
 router = APIRouter(prefix="/watchlists", tags=["Watchlists"])
 
+# Stocks written per operation when creating a watchlist from a large index
+_INDEX_STOCKS_BATCH_SIZE = 500
+
+# $project stage shaping watchlist documents into the response format
+# server-side; ids arrive as strings and datetimes are decoded as ISO strings
+# by JSON_CODEC_OPTIONS
+_WATCHLIST_PROJECTION = {
+    "_id": 0,
+    "id": {"$toString": "$_id"},
+    "user_id": {"$toString": "$user_id"},
+    "name": 1,
+    "description": {"$ifNull": ["$description", None]},
+    "stocks": {
+        "$map": {
+            "input": {"$ifNull": ["$stocks", []]},
+            "as": "s",
+            "in": {
+                "symbol": "$$s.symbol",
+                "name": {"$ifNull": ["$$s.name", None]},
+                "added_at": "$$s.added_at"
+            }
+        }
+    },
+    "created_at": 1,
+    "updated_at": 1,
+    "is_default": {"$ifNull": ["$is_default", False]}
+}
+
+
+def _iso(value: Any) -> str:
+    """Return a datetime as ISO 8601; values decoded with JSON_CODEC_OPTIONS already are"""
+    return value if isinstance(value, str) else value.isoformat()
+
+
+def _watchlist_to_json(watchlist: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a watchlist document into its JSON response shape
+
+    Mirrors WatchlistResponse, but builds the payload in a single pass
+    instead of validating a model per stock. Accepts documents read through
+    get_watchlists_collection (ids and datetimes already strings) as well
+    as freshly inserted ones.
+
+    Args:
+        watchlist: Watchlist document from MongoDB
+
+    Returns:
+        JSON-serializable watchlist dictionary
+    """
+    return {
+        "id": str(watchlist["_id"]),
+        "user_id": str(watchlist["user_id"]),
+        "name": watchlist["name"],
+        "description": watchlist.get("description"),
+        "stocks": [
+            {
+                "symbol": s["symbol"],
+                "name": s.get("name"),
+                "added_at": _iso(s["added_at"])
+            } for s in watchlist.get("stocks", [])
+        ],
+        "created_at": _iso(watchlist["created_at"]),
+        "updated_at": _iso(watchlist["updated_at"]),
+        "is_default": watchlist.get("is_default", False)
+    }
+
 
 @router.post("", response_model=WatchlistResponse, status_code=status.HTTP_201_CREATED)
 async def create_watchlist(
     watchlist_data: WatchlistCreate,
-    user_id: str = Depends(get_current_user_id),
+    user_oid: ObjectId = Depends(get_current_user_oid),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Create a new watchlist"""
 
-    # Create watchlist
+    # Create watchlist; one timestamp covers the watchlist and its stocks
+    now = utc_now()
     watchlist = Watchlist(
-        user_id=ObjectId(user_id),
+        user_id=user_oid,
         name=watchlist_data.name,
         description=watchlist_data.description,
-        stocks=[Stock(symbol=s.symbol, name=s.name) for s in watchlist_data.stocks]
+        stocks=[Stock(symbol=s.symbol, name=s.name, added_at=now) for s in watchlist_data.stocks],
+        created_at=now,
+        updated_at=now
     )
 
-    # Insert into database
-    result = await db.watchlists.insert_one(
-        watchlist.model_dump(by_alias=True, exclude={"id"})
-    )
+    # Insert into database (insert_one sets _id on the document, so the
+    # created watchlist does not need to be fetched back)
+    created_watchlist = watchlist.model_dump(by_alias=True, exclude={"id"})
+    await db.watchlists.insert_one(created_watchlist)
 
-    # Fetch created watchlist
-    created_watchlist = await db.watchlists.find_one({"_id": result.inserted_id})
-
-    return WatchlistResponse(
-        id=str(created_watchlist["_id"]),
-        user_id=str(created_watchlist["user_id"]),
-        name=created_watchlist["name"],
-        description=created_watchlist.get("description"),
-        stocks=[
-            StockResponse(
-                symbol=s["symbol"],
-                name=s.get("name"),
-                added_at=s["added_at"]
-            ) for s in created_watchlist.get("stocks", [])
-        ],
-        created_at=created_watchlist["created_at"],
-        updated_at=created_watchlist["updated_at"],
-        is_default=created_watchlist.get("is_default", False)
+    return ORJSONResponse(
+        status_code=status.HTTP_201_CREATED,
+        content=_watchlist_to_json(created_watchlist)
     )
 
 
 @router.get("", response_model=List[WatchlistResponse])
 async def get_watchlists(
-    user_id: str = Depends(get_current_user_id),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    limit: int = Query(50, ge=1, le=200),
+    skip: int = Query(0, ge=0),
+    user_oid: ObjectId = Depends(get_current_user_oid),
+    watchlists: AsyncIOMotorCollection = Depends(get_watchlists_collection)
 ):
-    """Get all watchlists for current user"""
-
-    cursor = db.watchlists.find({"user_id": ObjectId(user_id)})
-    watchlists = await cursor.to_list(length=None)
-
-    return [
-        WatchlistResponse(
-            id=str(w["_id"]),
-            user_id=str(w["user_id"]),
-            name=w["name"],
-            description=w.get("description"),
-            stocks=[
-                StockResponse(
-                    symbol=s["symbol"],
-                    name=s.get("name"),
-                    added_at=s["added_at"]
-                ) for s in w.get("stocks", [])
-            ],
-            created_at=w["created_at"],
-            updated_at=w["updated_at"],
-            is_default=w.get("is_default", False)
-        ) for w in watchlists
-    ]
+    """Get a page of watchlists for current user"""
+
+    cursor = watchlists.aggregate([
+        {"$match": {"user_id": user_oid}},
+        {"$sort": {"_id": 1}},
+        {"$skip": skip},
+        {"$limit": limit},
+        {"$project": _WATCHLIST_PROJECTION}
+    ])
+    user_watchlists = await cursor.to_list(length=limit)
+
+    return ORJSONResponse(content=user_watchlists)
+
+
+@router.get("/export")
+async def export_watchlists(
+    user_oid: ObjectId = Depends(get_current_user_oid),
+    watchlists: AsyncIOMotorCollection = Depends(get_watchlists_collection)
+):
+    """Stream all watchlists for current user as newline-delimited JSON"""
+
+    cursor = watchlists.aggregate([
+        {"$match": {"user_id": user_oid}},
+        {"$sort": {"_id": 1}},
+        {"$project": _WATCHLIST_PROJECTION}
+    ])
+
+    async def stream() -> AsyncIterator[bytes]:
+        async for watchlist in cursor:
+            yield orjson.dumps(watchlist) + b"\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
 @router.get("/{watchlist_id}", response_model=WatchlistResponse)
 async def get_watchlist(
     watchlist_id: str,
-    user_id: str = Depends(get_current_user_id),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    user_oid: ObjectId = Depends(get_current_user_oid),
+    watchlists: AsyncIOMotorCollection = Depends(get_watchlists_collection)
 ):
     """Get a specific watchlist"""
 
-    watchlist = await db.watchlists.find_one({
+    watchlist = await watchlists.find_one({
         "_id": ObjectId(watchlist_id),
-        "user_id": ObjectId(user_id)
+        "user_id": user_oid
     })
 
     if not watchlist:
@@ -111,91 +179,54 @@ async def get_watchlist(
             detail="Watchlist not found"
         )
 
-    return WatchlistResponse(
-        id=str(watchlist["_id"]),
-        user_id=str(watchlist["user_id"]),
-        name=watchlist["name"],
-        description=watchlist.get("description"),
-        stocks=[
-            StockResponse(
-                symbol=s["symbol"],
-                name=s.get("name"),
-                added_at=s["added_at"]
-            ) for s in watchlist.get("stocks", [])
-        ],
-        created_at=watchlist["created_at"],
-        updated_at=watchlist["updated_at"],
-        is_default=watchlist.get("is_default", False)
-    )
+    return ORJSONResponse(content=_watchlist_to_json(watchlist))
 
 
 @router.put("/{watchlist_id}", response_model=WatchlistResponse)
 async def update_watchlist(
     watchlist_id: str,
     watchlist_update: WatchlistUpdate,
-    user_id: str = Depends(get_current_user_id),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    user_oid: ObjectId = Depends(get_current_user_oid),
+    watchlists: AsyncIOMotorCollection = Depends(get_watchlists_collection)
 ):
     """Update watchlist metadata"""
 
-    # Check if watchlist exists and belongs to user
-    watchlist = await db.watchlists.find_one({
-        "_id": ObjectId(watchlist_id),
-        "user_id": ObjectId(user_id)
-    })
-
-    if not watchlist:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Watchlist not found"
-        )
-
-    # Prepare update data
-    update_data = {"updated_at": datetime.utcnow()}
+    # Prepare update data; updated_at is stamped by the server. User values
+    # are wrapped in $literal so they are never read as field paths.
+    update_data = {"updated_at": "$$NOW"}
 
     if watchlist_update.name is not None:
-        update_data["name"] = watchlist_update.name
+        update_data["name"] = {"$literal": watchlist_update.name}
     if watchlist_update.description is not None:
-        update_data["description"] = watchlist_update.description
+        update_data["description"] = {"$literal": watchlist_update.description}
 
-    # Update watchlist
-    await db.watchlists.update_one(
-        {"_id": ObjectId(watchlist_id)},
-        {"$set": update_data}
+    # Update watchlist (ownership checked in the filter) and fetch it in one round trip
+    updated_watchlist = await watchlists.find_one_and_update(
+        {"_id": ObjectId(watchlist_id), "user_id": user_oid},
+        [{"$set": update_data}],
+        return_document=ReturnDocument.AFTER
     )
 
-    # Fetch updated watchlist
-    updated_watchlist = await db.watchlists.find_one({"_id": ObjectId(watchlist_id)})
-
-    return WatchlistResponse(
-        id=str(updated_watchlist["_id"]),
-        user_id=str(updated_watchlist["user_id"]),
-        name=updated_watchlist["name"],
-        description=updated_watchlist.get("description"),
-        stocks=[
-            StockResponse(
-                symbol=s["symbol"],
-                name=s.get("name"),
-                added_at=s["added_at"]
-            ) for s in updated_watchlist.get("stocks", [])
-        ],
-        created_at=updated_watchlist["created_at"],
-        updated_at=updated_watchlist["updated_at"],
-        is_default=updated_watchlist.get("is_default", False)
-    )
+    if not updated_watchlist:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Watchlist not found"
+        )
+
+    return ORJSONResponse(content=_watchlist_to_json(updated_watchlist))
 
 
 @router.delete("/{watchlist_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_watchlist(
     watchlist_id: str,
-    user_id: str = Depends(get_current_user_id),
+    user_oid: ObjectId = Depends(get_current_user_oid),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Delete a watchlist"""
 
     result = await db.watchlists.delete_one({
         "_id": ObjectId(watchlist_id),
-        "user_id": ObjectId(user_id)
+        "user_id": user_oid
     })
 
     if result.deleted_count == 0:
@@ -209,118 +240,169 @@ async def delete_watchlist(
 async def add_stock_to_watchlist(
     watchlist_id: str,
     stock_data: StockAdd,
-    user_id: str = Depends(get_current_user_id),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    user_oid: ObjectId = Depends(get_current_user_oid),
+    watchlists: AsyncIOMotorCollection = Depends(get_watchlists_collection)
 ):
     """Add a stock to watchlist"""
 
-    # Check if watchlist exists and belongs to user
-    watchlist = await db.watchlists.find_one({
-        "_id": ObjectId(watchlist_id),
-        "user_id": ObjectId(user_id)
-    })
+    watchlist_oid = ObjectId(watchlist_id)
 
-    if not watchlist:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Watchlist not found"
-        )
+    # Add stock unless it is already present; the filter carries the
+    # ownership and duplicate checks so this is a single round trip.
+    # Timestamps are stamped by the server.
+    new_stock = {
+        "symbol": {"$literal": stock_data.symbol},
+        "name": {"$literal": stock_data.name},
+        "added_at": "$$NOW"
+    }
+
+    updated_watchlist = await watchlists.find_one_and_update(
+        {
+            "_id": watchlist_oid,
+            "user_id": user_oid,
+            "stocks.symbol": {"$ne": stock_data.symbol}
+        },
+        [{
+            "$set": {
+                "stocks": {"$concatArrays": [{"$ifNull": ["$stocks", []]}, [new_stock]]},
+                "updated_at": "$$NOW"
+            }
+        }],
+        return_document=ReturnDocument.AFTER
+    )
 
-    # Check if stock already exists in watchlist
-    existing_stocks = watchlist.get("stocks", [])
-    if any(s["symbol"] == stock_data.symbol for s in existing_stocks):
+    if not updated_watchlist:
+        # Distinguish a missing watchlist from a duplicate stock
+        exists = await watchlists.find_one(
+            {"_id": watchlist_oid, "user_id": user_oid},
+            {"_id": 1}
+        )
+        if not exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Watchlist not found"
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Stock already exists in watchlist"
         )
 
-    # Add stock to watchlist
-    new_stock = Stock(symbol=stock_data.symbol, name=stock_data.name)
+    return ORJSONResponse(content=_watchlist_to_json(updated_watchlist))
+
+
+@router.post("/{watchlist_id}/stocks/batch", response_model=WatchlistResponse)
+async def add_stocks_to_watchlist(
+    watchlist_id: str,
+    batch_data: StockBatchAdd,
+    user_oid: ObjectId = Depends(get_current_user_oid),
+    watchlists: AsyncIOMotorCollection = Depends(get_watchlists_collection)
+):
+    """Add several stocks to a watchlist, skipping ones already present"""
+
+    watchlist_oid = ObjectId(watchlist_id)
+
+    # Drop duplicates within the request (first occurrence wins)
+    stocks_by_symbol = {}
+    for stock in batch_data.stocks:
+        stocks_by_symbol.setdefault(stock.symbol, stock)
+    symbols = list(stocks_by_symbol)
 
-    await db.watchlists.update_one(
-        {"_id": ObjectId(watchlist_id)},
+    new_stocks = [
         {
-            "$push": {"stocks": new_stock.model_dump()},
-            "$set": {"updated_at": datetime.utcnow()}
-        }
-    )
+            "symbol": {"$literal": stock.symbol},
+            "name": {"$literal": stock.name},
+            "added_at": "$$NOW"
+        } for stock in stocks_by_symbol.values()
+    ]
 
-    # Fetch updated watchlist
-    updated_watchlist = await db.watchlists.find_one({"_id": ObjectId(watchlist_id)})
-
-    return WatchlistResponse(
-        id=str(updated_watchlist["_id"]),
-        user_id=str(updated_watchlist["user_id"]),
-        name=updated_watchlist["name"],
-        description=updated_watchlist.get("description"),
-        stocks=[
-            StockResponse(
-                symbol=s["symbol"],
-                name=s.get("name"),
-                added_at=s["added_at"]
-            ) for s in updated_watchlist.get("stocks", [])
-        ],
-        created_at=updated_watchlist["created_at"],
-        updated_at=updated_watchlist["updated_at"],
-        is_default=updated_watchlist.get("is_default", False)
+    # Append only stocks whose symbol is not already in the watchlist. The
+    # filter requires at least one new symbol, so a miss means either the
+    # watchlist does not exist or every symbol is already present.
+    updated_watchlist = await watchlists.find_one_and_update(
+        {
+            "_id": watchlist_oid,
+            "user_id": user_oid,
+            "stocks.symbol": {"$not": {"$all": symbols}}
+        },
+        [{
+            "$set": {
+                "stocks": {
+                    "$concatArrays": [
+                        {"$ifNull": ["$stocks", []]},
+                        {
+                            "$filter": {
+                                "input": new_stocks,
+                                "cond": {
+                                    "$not": {"$in": ["$$this.symbol", {"$ifNull": ["$stocks.symbol", []]}]}
+                                }
+                            }
+                        }
+                    ]
+                },
+                "updated_at": "$$NOW"
+            }
+        }],
+        return_document=ReturnDocument.AFTER
     )
 
+    if not updated_watchlist:
+        # Distinguish a missing watchlist from all stocks being duplicates
+        exists = await watchlists.find_one(
+            {"_id": watchlist_oid, "user_id": user_oid},
+            {"_id": 1}
+        )
+        if not exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Watchlist not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="All stocks already exist in watchlist"
+        )
+
+    return ORJSONResponse(content=_watchlist_to_json(updated_watchlist))
+
 
 @router.delete("/{watchlist_id}/stocks/{symbol}", response_model=WatchlistResponse)
 async def remove_stock_from_watchlist(
     watchlist_id: str,
     symbol: str,
-    user_id: str = Depends(get_current_user_id),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    user_oid: ObjectId = Depends(get_current_user_oid),
+    watchlists: AsyncIOMotorCollection = Depends(get_watchlists_collection)
 ):
     """Remove a stock from watchlist"""
 
-    # Check if watchlist exists and belongs to user
-    watchlist = await db.watchlists.find_one({
-        "_id": ObjectId(watchlist_id),
-        "user_id": ObjectId(user_id)
-    })
+    # Remove stock (ownership checked in the filter) and fetch it in one round trip
+    updated_watchlist = await watchlists.find_one_and_update(
+        {"_id": ObjectId(watchlist_id), "user_id": user_oid},
+        [{
+            "$set": {
+                "stocks": {
+                    "$filter": {
+                        "input": {"$ifNull": ["$stocks", []]},
+                        "cond": {"$ne": ["$$this.symbol", {"$literal": symbol}]}
+                    }
+                },
+                "updated_at": "$$NOW"
+            }
+        }],
+        return_document=ReturnDocument.AFTER
+    )
 
-    if not watchlist:
+    if not updated_watchlist:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Watchlist not found"
         )
 
-    # Remove stock from watchlist
-    await db.watchlists.update_one(
-        {"_id": ObjectId(watchlist_id)},
-        {
-            "$pull": {"stocks": {"symbol": symbol}},
-            "$set": {"updated_at": datetime.utcnow()}
-        }
-    )
-
-    # Fetch updated watchlist
-    updated_watchlist = await db.watchlists.find_one({"_id": ObjectId(watchlist_id)})
-
-    return WatchlistResponse(
-        id=str(updated_watchlist["_id"]),
-        user_id=str(updated_watchlist["user_id"]),
-        name=updated_watchlist["name"],
-        description=updated_watchlist.get("description"),
-        stocks=[
-            StockResponse(
-                symbol=s["symbol"],
-                name=s.get("name"),
-                added_at=s["added_at"]
-            ) for s in updated_watchlist.get("stocks", [])
-        ],
-        created_at=updated_watchlist["created_at"],
-        updated_at=updated_watchlist["updated_at"],
-        is_default=updated_watchlist.get("is_default", False)
-    )
+    return ORJSONResponse(content=_watchlist_to_json(updated_watchlist))
 
 
 @router.post("/from-index", response_model=WatchlistResponse, status_code=status.HTTP_201_CREATED)
 async def create_watchlist_from_index(
     index_data: IndexWatchlistCreate,
-    user_id: str = Depends(get_current_user_id),
+    user_oid: ObjectId = Depends(get_current_user_oid),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Create a watchlist from a market index"""
@@ -332,37 +414,42 @@ async def create_watchlist_from_index(
         # Create watchlist name
         watchlist_name = index_data.watchlist_name or f"{index_data.index_name.upper()} Stocks"
 
-        # Create watchlist
-        watchlist = Watchlist(
-            user_id=ObjectId(user_id),
-            name=watchlist_name,
-            description=f"Auto-generated from {index_data.index_name.upper()} index",
-            stocks=[Stock(symbol=s["symbol"], name=s["name"]) for s in stocks_data]
-        )
-
-        # Insert into database
-        result = await db.watchlists.insert_one(
-            watchlist.model_dump(by_alias=True, exclude={"id"})
-        )
+        # Build the watchlist document directly; index constituents are
+        # already clean, so skip per-stock model validation
+        now = utc_now()
+        stocks = [
+            {"symbol": s["symbol"], "name": s["name"], "added_at": now}
+            for s in stocks_data
+        ]
+        created_watchlist = {
+            "user_id": user_oid,
+            "name": watchlist_name,
+            "description": f"Auto-generated from {index_data.index_name.upper()} index",
+            "stocks": stocks[:_INDEX_STOCKS_BATCH_SIZE],
+            "created_at": now,
+            "updated_at": now,
+            "is_default": False
+        }
 
-        # Fetch created watchlist
-        created_watchlist = await db.watchlists.find_one({"_id": result.inserted_id})
-
-        return WatchlistResponse(
-            id=str(created_watchlist["_id"]),
-            user_id=str(created_watchlist["user_id"]),
-            name=created_watchlist["name"],
-            description=created_watchlist.get("description"),
-            stocks=[
-                StockResponse(
-                    symbol=s["symbol"],
-                    name=s.get("name"),
-                    added_at=s["added_at"]
-                ) for s in created_watchlist.get("stocks", [])
-            ],
-            created_at=created_watchlist["created_at"],
-            updated_at=created_watchlist["updated_at"],
-            is_default=created_watchlist.get("is_default", False)
+        # Insert into database (insert_one sets _id on the document)
+        await db.watchlists.insert_one(created_watchlist)
+
+        # Append the remaining constituents of large indices in batches,
+        # all sent in a single bulk_write
+        remaining = stocks[_INDEX_STOCKS_BATCH_SIZE:]
+        if remaining:
+            await db.watchlists.bulk_write([
+                UpdateOne(
+                    {"_id": created_watchlist["_id"]},
+                    {"$push": {"stocks": {"$each": remaining[i:i + _INDEX_STOCKS_BATCH_SIZE]}}}
+                )
+                for i in range(0, len(remaining), _INDEX_STOCKS_BATCH_SIZE)
+            ])
+            created_watchlist["stocks"] = stocks
+
+        return ORJSONResponse(
+            status_code=status.HTTP_201_CREATED,
+            content=_watchlist_to_json(created_watchlist)
         )
 
     except ValueError as e:
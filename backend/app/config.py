@@ -1,5 +1,5 @@
 import os
-from typing import List
+from typing import FrozenSet
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -21,6 +21,7 @@ class Settings:
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
     REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))  # aim for ~250ms per hash
 
     # Database
     MONGODB_URL: str = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
@@ -29,6 +30,7 @@ class Settings:
     # Redis
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
     REDIS_PASSWORD: str = os.getenv("REDIS_PASSWORD", "")
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", "64"))
 
     # File Upload
     MAX_UPLOAD_SIZE: int = int(os.getenv("MAX_UPLOAD_SIZE", "52428800"))  # 50MB
@@ -46,4 +48,7 @@ settings = Settings()
 
 # Parse CORS origins manually from environment variable
 _cors_origins_str = os.getenv("CORS_ORIGINS_STR", "http://localhost:3000,http://localhost:5173,http://localhost:85,http://localhost:8005")
-CORS_ORIGINS: List[str] = [origin.strip() for origin in _cors_origins_str.split(',') if origin.strip()]
+# (frozenset so CORSMiddleware's per-request origin check is a hash lookup)
+CORS_ORIGINS: FrozenSet[str] = frozenset(
+    origin.strip() for origin in _cors_origins_str.split(',') if origin.strip()
+)
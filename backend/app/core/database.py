@@ -1,5 +1,8 @@
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
 from pymongo import MongoClient
+from bson import ObjectId
+from bson.codec_options import CodecOptions, TypeDecoder, TypeRegistry
+from datetime import datetime
 from typing import Optional
 import logging
 
@@ -8,11 +11,38 @@ from app.config import settings
 logger = logging.getLogger(__name__)
 
 
+class ObjectIdStrCodec(TypeDecoder):
+    """Decode BSON ObjectIds straight to their hex string"""
+    bson_type = ObjectId
+
+    def transform_bson(self, value: ObjectId) -> str:
+        return str(value)
+
+
+class DatetimeIsoCodec(TypeDecoder):
+    """Decode BSON datetimes straight to ISO 8601 strings"""
+    bson_type = datetime
+
+    def transform_bson(self, value: datetime) -> str:
+        return value.isoformat()
+
+
+# Handles bound once in connect_db and returned by the FastAPI dependencies below
+_database_instance: Optional[AsyncIOMotorDatabase] = None
+_watchlists_instance: Optional[AsyncIOMotorCollection] = None
+
+# Codec options for read paths that only turn documents into JSON responses
+JSON_CODEC_OPTIONS = CodecOptions(
+    type_registry=TypeRegistry([ObjectIdStrCodec(), DatetimeIsoCodec()])
+)
+
+
 class Database:
     """MongoDB database connection manager"""
 
     client: Optional[AsyncIOMotorClient] = None
     database: Optional[AsyncIOMotorDatabase] = None
+    watchlists: Optional[AsyncIOMotorCollection] = None
 
     @classmethod
     async def connect_db(cls):
@@ -24,9 +54,22 @@ class Database:
                 maxPoolSize=100,
                 minPoolSize=10,
                 serverSelectionTimeoutMS=5000,
+                # Compress wire traffic; large watchlist documents shrink a lot
+                compressors="zstd,zlib",
+                zlibCompressionLevel=3,
+                uuidRepresentation="standard",
             )
             cls.database = cls.client[settings.MONGODB_DB_NAME]
 
+            # Watchlists handle whose documents decode ready for JSON responses
+            cls.watchlists = cls.database.get_collection(
+                "watchlists", codec_options=JSON_CODEC_OPTIONS
+            )
+
+            global _database_instance, _watchlists_instance
+            _database_instance = cls.database
+            _watchlists_instance = cls.watchlists
+
             # Test connection
             await cls.client.admin.command("ping")
             logger.info(f"Successfully connected to MongoDB database: {settings.MONGODB_DB_NAME}")
@@ -69,6 +112,8 @@ class Database:
             # Watchlists collection indexes
             await cls.database.watchlists.create_index("user_id")
             await cls.database.watchlists.create_index([("user_id", 1), ("name", 1)])
+            await cls.database.watchlists.create_index([("user_id", 1), ("_id", 1)])
+            await cls.database.watchlists.create_index("stocks.symbol")
 
             # Stock analysis collection indexes
             await cls.database.stock_analysis.create_index("user_id")
@@ -116,5 +161,10 @@ class Database:
 
 # Dependency for FastAPI
 async def get_database() -> AsyncIOMotorDatabase:
-    """FastAPI dependency to get database instance"""
-    return Database.get_database()
+    """FastAPI dependency to get the database instance bound in connect_db"""
+    return _database_instance
+
+
+async def get_watchlists_collection() -> AsyncIOMotorCollection:
+    """FastAPI dependency to get the watchlists collection with JSON_CODEC_OPTIONS"""
+    return _watchlists_instance
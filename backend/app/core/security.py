@@ -1,5 +1,10 @@
 from datetime import datetime, timedelta
+import logging
+import time
+import uuid
 from typing import Optional, Dict, Any
+from bson import ObjectId
+from bson.errors import InvalidId
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -7,8 +12,17 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+)
+
+# Acceptable time window for a single hash (milliseconds)
+HASH_TIME_TARGET_MS = (200, 500)
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
@@ -24,6 +38,31 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def check_password_hash_cost() -> float:
+    """
+    Time a single password hash and warn if it falls outside the target window
+
+    Used at startup so BCRYPT_ROUNDS can be retuned per deployment hardware.
+
+    Returns:
+        Elapsed time in milliseconds
+    """
+    start = time.perf_counter()
+    hash_password("x")
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    low, high = HASH_TIME_TARGET_MS
+    if not low <= elapsed_ms <= high:
+        logger.warning(
+            f"Password hashing took {elapsed_ms:.0f}ms with BCRYPT_ROUNDS={settings.BCRYPT_ROUNDS}; "
+            f"target is {low}-{high}ms, consider retuning"
+        )
+    else:
+        logger.info(f"Password hashing took {elapsed_ms:.0f}ms (BCRYPT_ROUNDS={settings.BCRYPT_ROUNDS})")
+
+    return elapsed_ms
+
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token
@@ -67,7 +106,8 @@ def create_refresh_token(data: Dict[str, Any]) -> str:
     to_encode.update({
         "exp": expire,
         "iat": datetime.utcnow(),
-        "type": "refresh"
+        "type": "refresh",
+        "jti": uuid.uuid4().hex
     })
 
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
@@ -88,7 +128,14 @@ def decode_token(token: str) -> Dict[str, Any]:
         HTTPException: If token is invalid or expired
     """
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        # Signature verification compares digests in constant time,
+        # so it must stay enabled; never compare token material with ==
+        payload = jwt.decode(
+            token,
+            settings.SECRET_KEY,
+            algorithms=[settings.ALGORITHM],
+            options={"verify_signature": True},
+        )
         return payload
     except JWTError as e:
         raise HTTPException(
@@ -125,6 +172,29 @@ async def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depend
     return user_id
 
 
+async def get_current_user_oid(user_id: str = Depends(get_current_user_id)) -> ObjectId:
+    """
+    FastAPI dependency to get current user ID as an ObjectId
+
+    Args:
+        user_id: User ID resolved by get_current_user_id
+
+    Returns:
+        User ID parsed once per request
+
+    Raises:
+        HTTPException: If the token's user ID is not a valid ObjectId
+    """
+    try:
+        return ObjectId(user_id)
+    except (InvalidId, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
 async def get_current_user_email(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
     """
     FastAPI dependency to get current user email from JWT token
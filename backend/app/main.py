@@ -7,8 +7,10 @@ import logging
 
 from app.config import settings, CORS_ORIGINS
 from app.core.database import Database
+from app.core.security import check_password_hash_cost
 from app.api.v1 import auth, watchlist, stocks, upload
 from app.services.yfinance_rate_limiter import get_rate_limiter
+from app.utils.fastapi_patches import install_dependency_inspection_cache
 
 # Configure logging
 logging.basicConfig(
@@ -17,6 +19,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Memoize FastAPI's per-request dependency introspection
+install_dependency_inspection_cache()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -26,6 +31,9 @@ async def lifespan(app: FastAPI):
     try:
         await Database.connect_db()
 
+        # Report password hashing cost so BCRYPT_ROUNDS can be tuned
+        check_password_hash_cost()
+
         # Start Yahoo Finance rate limiter
         rate_limiter = get_rate_limiter()
         await rate_limiter.start()
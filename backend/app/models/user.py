@@ -1,75 +1,97 @@
 from datetime import datetime
-from typing import Optional, Dict, Any
-from pydantic import BaseModel, EmailStr, Field, GetCoreSchemaHandler
+from typing import Annotated, Any, ClassVar, Dict, Optional
+from pydantic import BaseModel, BeforeValidator, ConfigDict, EmailStr, Field, GetCoreSchemaHandler
 from pydantic_core import core_schema
 from bson import ObjectId
+from bson.errors import InvalidId
+
+from app.utils.dates import utc_now
 
 
 class PyObjectId(ObjectId):
     """Custom ObjectId type for Pydantic v2"""
 
+    # Built on first use and shared by every field of this type
+    _core_schema: ClassVar[Optional[core_schema.CoreSchema]] = None
+
     @classmethod
     def __get_pydantic_core_schema__(
         cls,
         source_type: Any,
         handler: GetCoreSchemaHandler
     ) -> core_schema.CoreSchema:
-        return core_schema.union_schema([
-            core_schema.is_instance_schema(ObjectId),
-            core_schema.chain_schema([
-                core_schema.str_schema(),
-                core_schema.no_info_plain_validator_function(cls.validate),
-            ])
-        ],
-        serialization=core_schema.plain_serializer_function_ser_schema(
-            lambda x: str(x)
-        ))
+        if cls._core_schema is None:
+            cls._core_schema = core_schema.union_schema([
+                core_schema.is_instance_schema(ObjectId),
+                core_schema.chain_schema([
+                    core_schema.str_schema(),
+                    core_schema.no_info_plain_validator_function(cls.validate),
+                ])
+            ],
+            # Keep real ObjectIds in python-mode dumps (documents written to
+            # MongoDB); only JSON output gets the hex string
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                str, when_used="json"
+            ))
+        return cls._core_schema
 
     @classmethod
     def validate(cls, v):
         if isinstance(v, ObjectId):
             return v
-        if not ObjectId.is_valid(v):
+        # Parse once; ObjectId() already rejects malformed input
+        try:
+            return ObjectId(v)
+        except (InvalidId, TypeError):
             raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
+
+
+def _object_id_to_str(v: Any) -> Any:
+    return str(v) if isinstance(v, ObjectId) else v
+
+
+# Document _id read back from MongoDB, kept as its hex string; a single
+# isinstance check instead of PyObjectId's union schema
+ObjectIdStr = Annotated[str, BeforeValidator(_object_id_to_str)]
+
+
+# Default analysis weightage, copied into a fresh dict per UserPreferences
+_DEFAULT_WEIGHTAGE = (
+    ("price_action", 1),
+    ("reversal_patterns", 1),
+    ("candlestick_patterns", 1),
+    ("indicators", 1),
+    ("volatility", 1),
+    ("time_analysis", 1),
+    ("news", 1),
+)
 
 
 class UserPreferences(BaseModel):
     """User preferences for analysis"""
     default_weightage: Dict[str, int] = Field(
-        default={
-            "price_action": 1,
-            "reversal_patterns": 1,
-            "candlestick_patterns": 1,
-            "indicators": 1,
-            "volatility": 1,
-            "time_analysis": 1,
-            "news": 1
-        }
+        default_factory=lambda: dict(_DEFAULT_WEIGHTAGE)
     )
     theme: str = Field(default="light")
     default_timeframe: str = Field(default="1d")
 
+    model_config = ConfigDict(frozen=True)
+
 
 class UserInDB(BaseModel):
     """User model for MongoDB"""
-    id: Optional[PyObjectId] = Field(default=None, alias="_id")
+    id: Optional[ObjectIdStr] = Field(default=None, alias="_id")
     email: EmailStr
     username: str
     password_hash: str
     full_name: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utc_now)
+    updated_at: datetime = Field(default_factory=utc_now)
     is_active: bool = True
+    # A fresh instance per user: frozen=True doesn't freeze the weightage dict
     preferences: UserPreferences = Field(default_factory=UserPreferences)
 
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda v: v.isoformat()
-        }
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
 
 
 class User(BaseModel):
@@ -83,8 +105,4 @@ class User(BaseModel):
     is_active: bool
     preferences: UserPreferences
 
-    class Config:
-        populate_by_name = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    model_config = ConfigDict(populate_by_name=True)
@@ -1,6 +1,10 @@
 from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import Optional
 from datetime import datetime
+import re
+
+# Letters, digits, underscores and hyphens only
+_USERNAME_RE = re.compile(r'^[A-Za-z0-9_-]+\Z')
 
 
 class UserRegister(BaseModel):
@@ -12,18 +16,11 @@ class UserRegister(BaseModel):
 
     @field_validator('username')
     @classmethod
-    def username_alphanumeric(cls, v):
-        if not v.replace('_', '').replace('-', '').isalnum():
+    def username_alphanumeric(cls, v: str) -> str:
+        if not _USERNAME_RE.match(v):
             raise ValueError('Username must be alphanumeric (underscores and hyphens allowed)')
         return v.lower()
 
-    @field_validator('password')
-    @classmethod
-    def password_strength(cls, v):
-        if len(v) < 8:
-            raise ValueError('Password must be at least 8 characters long')
-        return v
-
 
 class UserLogin(BaseModel):
     """Schema for user login"""
@@ -40,11 +37,6 @@ class UserResponse(BaseModel):
     created_at: datetime
     is_active: bool
 
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
-
 
 class UserUpdate(BaseModel):
     """Schema for updating user profile"""
@@ -68,10 +60,3 @@ class PasswordChange(BaseModel):
     """Schema for password change"""
     current_password: str
     new_password: str = Field(..., min_length=8, max_length=100)
-
-    @field_validator('new_password')
-    @classmethod
-    def password_strength(cls, v):
-        if len(v) < 8:
-            raise ValueError('Password must be at least 8 characters long')
-        return v
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 from typing import Optional, List
 from datetime import datetime
 
@@ -9,6 +9,11 @@ class StockAdd(BaseModel):
     name: Optional[str] = Field(None, max_length=200, description="Company name")
 
 
+class StockBatchAdd(BaseModel):
+    """Schema for adding several stocks to a watchlist at once"""
+    stocks: List[StockAdd] = Field(..., min_length=1)
+
+
 class WatchlistCreate(BaseModel):
     """Schema for creating a new watchlist"""
     name: str = Field(..., min_length=1, max_length=100)
@@ -28,11 +33,6 @@ class StockResponse(BaseModel):
     name: Optional[str]
     added_at: datetime
 
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
-
 
 class WatchlistResponse(BaseModel):
     """Schema for watchlist response"""
@@ -45,11 +45,6 @@ class WatchlistResponse(BaseModel):
     updated_at: datetime
     is_default: bool
 
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
-
 
 class StockSearchResult(BaseModel):
     """Schema for stock search result"""
@@ -59,7 +54,11 @@ class StockSearchResult(BaseModel):
     type: str
 
 
+# Validates/serializes whole result lists in one pass (schema built once)
+STOCK_SEARCH_RESULTS_ADAPTER = TypeAdapter(List[StockSearchResult])
+
+
 class IndexWatchlistCreate(BaseModel):
     """Schema for creating watchlist from index"""
     index_name: str = Field(..., description="Index name: nifty50, banknifty, nifty100, niftynext50")
-    watchlist_name: Optional[str] = Field(None, description="Custom watchlist name (optional)")
+    watchlist_name: Optional[str] = Field(None, max_length=100, description="Custom watchlist name (optional)")
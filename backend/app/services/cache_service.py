@@ -1,29 +1,49 @@
-import json
+import asyncio
+import fnmatch
+import hashlib
 import logging
-from typing import Optional, Any
+from typing import Optional, Any, Awaitable, Callable, Dict, List
 from datetime import timedelta
+import orjson
 import redis.asyncio as redis
+from cachetools import TTLCache
 
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Sentinel for local cache misses (None is never cached, but keep it explicit)
+_MISS = object()
+
+# Keys per SCAN page and per pipelined UNLINK batch in delete_pattern
+_DELETE_BATCH_SIZE = 500
+
 
 class CacheService:
     """Redis caching service for stock data"""
 
     _redis_client: Optional[redis.Redis] = None
 
+    # Process-local copy of hot keys, consulted before Redis. Values are shared
+    # between callers, so anything returned by get/mget must not be mutated.
+    _local: TTLCache = TTLCache(maxsize=4096, ttl=30)
+
     @classmethod
     async def get_client(cls) -> redis.Redis:
         """Get or create Redis client"""
         if cls._redis_client is None:
             try:
-                cls._redis_client = redis.from_url(
+                pool = redis.ConnectionPool.from_url(
                     settings.REDIS_URL,
                     password=settings.REDIS_PASSWORD if settings.REDIS_PASSWORD else None,
-                    decode_responses=True
+                    max_connections=settings.REDIS_MAX_CONNECTIONS,
+                    socket_keepalive=True,
+                    socket_timeout=2,
+                    health_check_interval=30,
+                    # Values are orjson bytes; orjson.loads takes them as-is
+                    decode_responses=False
                 )
+                cls._redis_client = redis.Redis(connection_pool=pool)
                 # Test connection
                 await cls._redis_client.ping()
                 logger.info("Redis connection established")
@@ -38,9 +58,27 @@ class CacheService:
         """Close Redis connection"""
         if cls._redis_client:
             await cls._redis_client.close()
+            # The pool was created explicitly, so the client does not own it
+            await cls._redis_client.connection_pool.disconnect()
             cls._redis_client = None
             logger.info("Redis connection closed")
 
+    @staticmethod
+    def _serialize(value: Any) -> bytes:
+        """Serialize a value for storage in Redis"""
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+    @classmethod
+    def _remember(cls, key: str, value: Any, ttl: Optional[float] = None):
+        """Keep a value in the local cache unless its Redis TTL is shorter"""
+        if ttl is None or ttl >= cls._local.ttl:
+            cls._local[key] = value
+
+    @staticmethod
+    def _remaining_ttl(pttl: int) -> Optional[float]:
+        """Convert a PTTL reply to seconds (None when the key never expires)"""
+        return None if pttl == -1 else pttl / 1000
+
     @classmethod
     async def get(cls, key: str) -> Optional[Any]:
         """
@@ -50,14 +88,24 @@ class CacheService:
             key: Cache key
 
         Returns:
-            Cached value or None if not found
+            Cached value or None if not found; the value may be shared with
+            other callers and must not be mutated
         """
+        value = cls._local.get(key, _MISS)
+        if value is not _MISS:
+            return value
+
         try:
             client = await cls.get_client()
-            value = await client.get(key)
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.get(key)
+                pipe.pttl(key)
+                value, pttl = await pipe.execute()
 
             if value:
-                return json.loads(value)
+                value = orjson.loads(value)
+                cls._remember(key, value, cls._remaining_ttl(pttl))
+                return value
             return None
         except Exception as e:
             logger.error(f"Error getting cache key {key}: {e}")
@@ -83,17 +131,168 @@ class CacheService:
         """
         try:
             client = await cls.get_client()
-            serialized_value = json.dumps(value)
+            serialized_value = cls._serialize(value)
 
             if ttl is None:
                 ttl = 300  # Default 5 minutes
 
             await client.setex(key, ttl, serialized_value)
+            cls._remember(key, value, ttl)
             return True
         except Exception as e:
             logger.error(f"Error setting cache key {key}: {e}")
             return False
 
+    @classmethod
+    async def set_many(cls, values: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """
+        Set multiple values in cache in a single round trip
+
+        Args:
+            values: Mapping of cache key to value
+            ttl: Time to live in seconds (default: 300 seconds / 5 minutes)
+
+        Returns:
+            True if successful, False otherwise
+        """
+        if not values:
+            return True
+
+        try:
+            client = await cls.get_client()
+
+            if ttl is None:
+                ttl = 300  # Default 5 minutes
+
+            async with client.pipeline(transaction=False) as pipe:
+                for key, value in values.items():
+                    pipe.setex(key, ttl, cls._serialize(value))
+                await pipe.execute()
+
+            for key, value in values.items():
+                cls._remember(key, value, ttl)
+            return True
+        except Exception as e:
+            logger.error(f"Error setting {len(values)} cache keys: {e}")
+            return False
+
+    @classmethod
+    async def get_or_set(
+        cls,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+        lock_timeout_ms: int = 2000
+    ) -> Any:
+        """
+        Get value from cache, loading and caching it on a miss
+
+        Only one caller per key runs the loader at a time: the first to miss
+        takes a short-lived lock (SET NX PX) and the others poll the cache with
+        exponential backoff until the value appears or the lock expires.
+
+        Args:
+            key: Cache key
+            loader: Coroutine function producing the value on a miss
+            ttl: Time to live in seconds for the loaded value
+            lock_timeout_ms: Lock expiry and maximum wait for other callers
+
+        Returns:
+            Cached or freshly loaded value (falsy values are not cached)
+        """
+        cached = await cls.get(key)
+        if cached is not None:
+            return cached
+
+        lock_key = f"lock:{key}"
+        try:
+            client = await cls.get_client()
+            acquired = await client.set(lock_key, "1", nx=True, px=lock_timeout_ms)
+        except Exception as e:
+            logger.error(f"Error acquiring cache lock {lock_key}: {e}")
+            client = None
+            acquired = False
+
+        if not acquired and client is not None:
+            # Another caller is loading; wait for it to populate the cache
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + lock_timeout_ms / 1000
+            delay = 0.05
+            while loop.time() < deadline:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.5)
+                cached = await cls.get(key)
+                if cached is not None:
+                    return cached
+
+        try:
+            value = await loader()
+        except Exception:
+            if acquired:
+                await cls.delete(lock_key)
+            raise
+
+        if not acquired:
+            if value:
+                await cls.set(key, value, ttl=ttl)
+            return value
+
+        # Store the value and release the lock in a single round trip
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                if value:
+                    pipe.setex(key, ttl if ttl is not None else 300, cls._serialize(value))
+                pipe.delete(lock_key)
+                await pipe.execute()
+            if value:
+                cls._remember(key, value, ttl)
+        except Exception as e:
+            logger.error(f"Error storing cache key {key}: {e}")
+
+        return value
+
+    @classmethod
+    async def mget(cls, keys: List[str]) -> List[Optional[Any]]:
+        """
+        Get multiple values from cache in a single round trip
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            List of cached values (None for missing keys), in the order of keys;
+            values may be shared with other callers and must not be mutated
+        """
+        if not keys:
+            return []
+
+        results = [cls._local.get(key, _MISS) for key in keys]
+        missing = [i for i, value in enumerate(results) if value is _MISS]
+        if not missing:
+            return results
+
+        try:
+            client = await cls.get_client()
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.mget([keys[i] for i in missing])
+                for i in missing:
+                    pipe.pttl(keys[i])
+                values, *pttls = await pipe.execute()
+
+            for i, value, pttl in zip(missing, values, pttls):
+                if value:
+                    value = orjson.loads(value)
+                    cls._remember(keys[i], value, cls._remaining_ttl(pttl))
+                    results[i] = value
+                else:
+                    results[i] = None
+        except Exception as e:
+            logger.error(f"Error getting {len(missing)} cache keys: {e}")
+            for i in missing:
+                results[i] = None
+
+        return results
+
     @classmethod
     async def delete(cls, key: str) -> bool:
         """
@@ -105,6 +304,8 @@ class CacheService:
         Returns:
             True if successful, False otherwise
         """
+        cls._local.pop(key, None)
+
         try:
             client = await cls.get_client()
             await client.delete(key)
@@ -118,46 +319,62 @@ class CacheService:
         """
         Delete all keys matching a pattern
 
+        Keys are enumerated with SCAN and unlinked in pipelined batches, so
+        Redis is never blocked for longer than one batch.
+
         Args:
             pattern: Key pattern (e.g., "stock:*")
 
         Returns:
             Number of keys deleted
         """
+        for key in [k for k in list(cls._local.keys()) if fnmatch.fnmatchcase(k, pattern)]:
+            cls._local.pop(key, None)
+
         try:
             client = await cls.get_client()
-            keys = []
-
-            async for key in client.scan_iter(match=pattern):
-                keys.append(key)
-
-            if keys:
-                deleted = await client.delete(*keys)
-                return deleted
-
-            return 0
+            deleted = 0
+
+            async with client.pipeline(transaction=False) as pipe:
+                batch = []
+                async for key in client.scan_iter(match=pattern, count=_DELETE_BATCH_SIZE):
+                    batch.append(key)
+                    if len(batch) >= _DELETE_BATCH_SIZE:
+                        pipe.unlink(*batch)
+                        batch = []
+                if batch:
+                    pipe.unlink(*batch)
+                for count in await pipe.execute():
+                    deleted += count
+
+            return deleted
         except Exception as e:
             logger.error(f"Error deleting keys with pattern {pattern}: {e}")
             return 0
 
     @classmethod
-    async def exists(cls, key: str) -> bool:
+    async def exists(cls, key: str, on_error: Optional[bool] = False) -> Optional[bool]:
         """
         Check if key exists in cache
 
         Args:
             key: Cache key
+            on_error: Value returned if Redis cannot be reached (pass None to
+                tell "unknown" apart from "missing", e.g. for denylists)
 
         Returns:
-            True if exists, False otherwise
+            True if exists, False otherwise, on_error if Redis failed
         """
+        if key in cls._local:
+            return True
+
         try:
             client = await cls.get_client()
             result = await client.exists(key)
             return bool(result)
         except Exception as e:
             logger.error(f"Error checking cache key {key}: {e}")
-            return False
+            return on_error
 
     @classmethod
     def make_stock_key(cls, symbol: str, data_type: str = "info") -> str:
@@ -178,10 +395,27 @@ class CacheService:
         """
         Generate cache key for search results
 
+        The query is case- and whitespace-normalized and hashed, so keys have
+        a fixed length however long the query is.
+
         Args:
             query: Search query
 
         Returns:
             Cache key string
         """
-        return f"search:{query.lower()}"
+        normalized = " ".join(query.casefold().split())
+        return f"search:{hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()}"
+
+    @classmethod
+    def make_index_key(cls, index_name: str) -> str:
+        """
+        Generate cache key for index constituents
+
+        Args:
+            index_name: Index name (nifty50, banknifty, etc.)
+
+        Returns:
+            Cache key string
+        """
+        return f"index:{index_name.lower()}:stocks"
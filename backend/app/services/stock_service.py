@@ -1,18 +1,31 @@
-import yfinance as yf
+import pandas as pd
 from typing import Optional, List, Dict
+import asyncio
 import logging
+import re
 from datetime import datetime, timedelta
+from .cache_service import CacheService
 from .yfinance_rate_limiter import get_rate_limiter
 
 logger = logging.getLogger(__name__)
 
+# yf.download errors meaning the ticker has no data (as opposed to a failed request)
+_NO_DATA_RE = re.compile(r"delisted|no data found|no timezone found", re.IGNORECASE)
+
+# Fetched index constituents written back to Redis per pipelined set_many call
+_WRITE_BACK_BATCH = 10
+
+# Uncached symbols checked upstream per validate_symbols call; each costs one
+# rate-limiter token, so the rest are reported as unknown rather than queued
+_VALIDATE_MAX_UPSTREAM = 25
+
 
 class StockService:
     """Service for fetching stock data from Yahoo Finance with centralized rate limiting"""
 
-    # Indian market index constituents
+    # Indian market index constituents (immutable; tuples of symbols)
     INDICES = {
-        "nifty50": [
+        "nifty50": (
             "RELIANCE.NS", "TCS.NS", "HDFCBANK.NS", "INFY.NS", "ICICIBANK.NS",
             "HINDUNILVR.NS", "ITC.NS", "SBIN.NS", "BHARTIARTL.NS", "KOTAKBANK.NS",
             "LT.NS", "AXISBANK.NS", "ASIANPAINT.NS", "MARUTI.NS", "SUNPHARMA.NS",
@@ -23,14 +36,14 @@ class StockService:
             "DRREDDY.NS", "EICHERMOT.NS", "BRITANNIA.NS", "GRASIM.NS", "APOLLOHOSP.NS",
             "BPCL.NS", "DIVISLAB.NS", "TATACONSUM.NS", "HEROMOTOCO.NS", "SHRIRAMFIN.NS",
             "SBILIFE.NS", "ADANIPORTS.NS", "UPL.NS", "BAJAJ-AUTO.NS", "LTIM.NS"
-        ],
-        "banknifty": [
+        ),
+        "banknifty": (
             "HDFCBANK.NS", "ICICIBANK.NS", "SBIN.NS", "KOTAKBANK.NS", "AXISBANK.NS",
             "INDUSINDBK.NS", "BANDHANBNK.NS", "FEDERALBNK.NS", "AUBANK.NS", "IDFCFIRSTB.NS",
             "PNB.NS", "BANKBARODA.NS"
-        ],
-        "nifty100": [],  # Can be populated later
-        "niftynext50": []  # Can be populated later
+        ),
+        "nifty100": (),  # Can be populated later
+        "niftynext50": ()  # Can be populated later
     }
 
     @staticmethod
@@ -70,24 +83,29 @@ class StockService:
             if not info:
                 return None
 
-            return {
-                "symbol": symbol,
-                "name": info.get('longName', info.get('shortName', 'N/A')),
-                "exchange": info.get('exchange', 'NSE'),
-                "sector": info.get('sector', 'N/A'),
-                "industry": info.get('industry', 'N/A'),
-                "marketCap": info.get('marketCap', 0),
-                "currentPrice": info.get('currentPrice', info.get('regularMarketPrice', 0)),
-                "previousClose": info.get('previousClose', 0),
-                "dayHigh": info.get('dayHigh', 0),
-                "dayLow": info.get('dayLow', 0),
-                "volume": info.get('volume', 0),
-                "averageVolume": info.get('averageVolume', 0),
-            }
+            return StockService._format_stock_info(symbol, info)
         except Exception as e:
             logger.error(f"Error getting stock info for {symbol}: {e}")
             return None
 
+    @staticmethod
+    def _format_stock_info(symbol: str, info: Dict) -> Dict:
+        """Reduce a raw yfinance info dict to the fields served by the API"""
+        return {
+            "symbol": symbol,
+            "name": info.get('longName', info.get('shortName', 'N/A')),
+            "exchange": info.get('exchange', 'NSE'),
+            "sector": info.get('sector', 'N/A'),
+            "industry": info.get('industry', 'N/A'),
+            "marketCap": info.get('marketCap', 0),
+            "currentPrice": info.get('currentPrice', info.get('regularMarketPrice', 0)),
+            "previousClose": info.get('previousClose', 0),
+            "dayHigh": info.get('dayHigh', 0),
+            "dayLow": info.get('dayLow', 0),
+            "volume": info.get('volume', 0),
+            "averageVolume": info.get('averageVolume', 0),
+        }
+
     @staticmethod
     async def get_historical_data(
         symbol: str,
@@ -95,7 +113,7 @@ class StockService:
         interval: str = "1d"
     ) -> Optional[Dict]:
         """
-        Get historical price data
+        Get historical price data using rate limiter
 
         Args:
             symbol: Stock symbol
@@ -103,20 +121,24 @@ class StockService:
             interval: Data interval (1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo)
 
         Returns:
-            Historical data dict or None
+            Historical data dict or None; "index" holds epoch milliseconds and
+            "data" maps each column name to its values in index order
         """
         try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period=period, interval=interval)
+            rate_limiter = get_rate_limiter()
+            hist = await rate_limiter.fetch_historical(symbol, period, interval)
 
-            if hist.empty:
+            if hist is None:
                 return None
 
+            # Column-oriented: one list per column instead of a dict per row
             return {
                 "symbol": symbol,
                 "period": period,
                 "interval": interval,
-                "data": hist.to_dict('records')
+                "columns": list(hist.columns),
+                "index": (hist.index.asi8 // 1_000_000).tolist(),
+                "data": {column: hist[column].astype(float).tolist() for column in hist.columns}
             }
         except Exception as e:
             logger.error(f"Error getting historical data for {symbol}: {e}")
@@ -138,54 +160,217 @@ class StockService:
         if index_name_lower not in cls.INDICES:
             raise ValueError(f"Unknown index: {index_name}. Available: {list(cls.INDICES.keys())}")
 
-        symbols = cls.INDICES[index_name_lower]
-        stocks = []
+        # Constituents rarely change, so share one fetch per hour across requests
+        return await CacheService.get_or_set(
+            CacheService.make_index_key(index_name_lower),
+            lambda: cls._fetch_index_stocks(index_name_lower),
+            ttl=3600,
+            lock_timeout_ms=60_000
+        )
+
+    @classmethod
+    async def _fetch_index_stocks(cls, index_name: str) -> List[Dict[str, str]]:
+        """
+        Fetch names for every stock in an index through the rate limiter
+
+        Args:
+            index_name: Lowercase index name present in INDICES
+
+        Returns:
+            List of stocks with symbol and name
+        """
+        symbols = cls.INDICES[index_name]
         rate_limiter = get_rate_limiter()
 
-        logger.info(f"Queuing {len(symbols)} stocks for {index_name} to rate limiter...")
+        # Names already cached by /stocks/{symbol}/info, read in one round trip
+        keys = [CacheService.make_stock_key(symbol, "info") for symbol in symbols]
+        cached = await CacheService.mget(keys)
+        names = {
+            symbol: info["name"]
+            for symbol, info in zip(symbols, cached)
+            if info and info.get("name", "N/A") != "N/A"
+        }
+        uncached = [symbol for symbol in symbols if symbol not in names]
 
-        for i, symbol in enumerate(symbols):
-            try:
-                info = await rate_limiter.fetch_stock_info(symbol)
-
-                if info:
-                    stocks.append({
-                        "symbol": symbol,
-                        "name": info.get('longName', info.get('shortName', symbol))
-                    })
-                    logger.debug(f"Successfully fetched {symbol} ({i+1}/{len(symbols)})")
-                else:
-                    # Failed to fetch info, use symbol as fallback
-                    stocks.append({
-                        "symbol": symbol,
-                        "name": symbol.replace('.NS', '').replace('.BO', '')
-                    })
-                    logger.warning(f"Using fallback name for {symbol}")
+        logger.info(
+            f"Queuing {len(uncached)} of {len(symbols)} stocks for {index_name} to rate limiter..."
+        )
 
+        async def fetch(symbol: str):
+            try:
+                return symbol, await rate_limiter.fetch_stock_info(symbol)
             except Exception as e:
-                logger.warning(f"Could not fetch info for {symbol}: {e}")
-                stocks.append({
-                    "symbol": symbol,
-                    "name": symbol.replace('.NS', '').replace('.BO', '')
-                })
+                return symbol, e
+
+        # Queue every uncached symbol at once; the rate limiter still paces the calls.
+        # Results are written back in pipelined batches as they arrive, so a retry
+        # after a partial failure (or a timeout further up) finds most symbols warm.
+        fetched = {}
+        for completed in asyncio.as_completed([fetch(symbol) for symbol in uncached]):
+            symbol, info = await completed
+            if isinstance(info, Exception):
+                logger.warning(f"Could not fetch info for {symbol}: {info}")
+            elif not info:
+                logger.warning(f"Using fallback name for {symbol}")
+            else:
+                names[symbol] = info.get('longName', info.get('shortName'))
+                fetched[CacheService.make_stock_key(symbol, "info")] = (
+                    cls._format_stock_info(symbol, info)
+                )
+
+            if len(fetched) >= _WRITE_BACK_BATCH:
+                await CacheService.set_many(fetched, ttl=300)
+                fetched = {}
+
+        if fetched:
+            await CacheService.set_many(fetched, ttl=300)
+
+        stocks = [
+            {
+                "symbol": symbol,
+                # Failed to fetch info, use symbol as fallback
+                "name": names.get(symbol) or _FALLBACK_NAMES[symbol]
+            }
+            for symbol in symbols
+        ]
 
         logger.info(f"Completed fetching {len(stocks)} stocks for {index_name}")
         return stocks
 
     @staticmethod
-    async def validate_symbol(symbol: str) -> bool:
+    async def validate_symbols(symbols: List[str]) -> Dict[str, Optional[bool]]:
         """
-        Validate if a stock symbol exists
+        Validate many stock symbols with small batched, rate-limited calls
+
+        Results are cached per symbol (valid: 1 hour, invalid: 10 minutes), so
+        only uncached symbols are sent upstream, at most _VALIDATE_MAX_UPSTREAM
+        per call. A symbol with no price data is invalid; one that could not
+        be checked (upstream failure, rate limiting, over the cap) is reported
+        as None and not cached.
+
+        Args:
+            symbols: Stock symbols to validate (any case)
+
+        Returns:
+            Dict mapping each symbol to True (valid), False (invalid) or None (unknown)
+        """
+        symbols = list(dict.fromkeys(symbols))
+        keys = [CacheService.make_stock_key(s, "valid") for s in symbols]
+        cached = await CacheService.mget(keys)
+
+        results = {s: c["valid"] for s, c in zip(symbols, cached) if c is not None}
+        uncached = [s for s in symbols if s not in results]
+
+        if len(uncached) > _VALIDATE_MAX_UPSTREAM:
+            logger.warning(
+                f"Validating {_VALIDATE_MAX_UPSTREAM} of {len(uncached)} uncached symbols upstream"
+            )
+            results.update({s: None for s in uncached[_VALIDATE_MAX_UPSTREAM:]})
+            uncached = uncached[:_VALIDATE_MAX_UPSTREAM]
+
+        rate_limiter = get_rate_limiter()
+        batch_size = rate_limiter.download_batch_size
+        checked = []
+
+        for start in range(0, len(uncached), batch_size):
+            batch = uncached[start:start + batch_size]
+            try:
+                download = await rate_limiter.fetch_download(batch)
+            except Exception as e:
+                logger.warning(f"Batch validation of {len(batch)} symbols failed: {e}")
+                download = None
+
+            if download is None:
+                # Upstream is unavailable; don't queue the remaining batches
+                logger.warning(
+                    f"Upstream unavailable while validating {len(uncached) - start} symbols"
+                )
+                results.update({s: None for s in uncached[start:]})
+                break
+
+            results.update(StockService._symbols_with_data(batch, *download))
+            checked.extend(batch)
+
+        for is_valid, ttl in ((True, 3600), (False, 600)):
+            await CacheService.set_many(
+                {
+                    CacheService.make_stock_key(s, "valid"): {"valid": is_valid}
+                    for s in checked if results[s] is is_valid
+                },
+                ttl=ttl
+            )
+
+        return results
+
+    @staticmethod
+    def _symbols_with_data(
+        symbols: List[str],
+        data: pd.DataFrame,
+        errors: Dict[str, str]
+    ) -> Dict[str, Optional[bool]]:
+        """
+        Read a fetch_download result into per-symbol validity
+
+        yfinance upper-cases tickers, so the frame and errors are looked up
+        with the upper-cased symbol.
+
+        Args:
+            symbols: Symbols that were downloaded, as given by the caller
+            data: Downloaded prices (ticker-grouped columns for several symbols)
+            errors: Download errors by upper-cased ticker
+
+        Returns:
+            Dict mapping each symbol to True (has data), False (no data) or
+            None (the download failed for another reason)
+        """
+        grouped = isinstance(data.columns, pd.MultiIndex)
+        returned = set(data.columns.get_level_values(0)) if grouped else set()
+        results = {}
+
+        for symbol in symbols:
+            ticker = symbol.upper()
+            error = errors.get(ticker)
+            if error is not None and not _NO_DATA_RE.search(error):
+                # Failed for another reason (network, parsing); can't tell
+                logger.warning(f"Could not validate {symbol}: {error}")
+                results[symbol] = None
+            elif grouped:
+                results[symbol] = (
+                    ticker in returned and not data[ticker].dropna(how="all").empty
+                )
+            else:
+                # Single ticker downloads come back with flat columns
+                results[symbol] = not data.dropna(how="all").empty
+
+        return results
+
+    @staticmethod
+    async def validate_symbol(symbol: str) -> Optional[bool]:
+        """
+        Validate if a stock symbol exists using rate limiter
 
         Args:
             symbol: Stock symbol to validate
 
         Returns:
-            True if valid, False otherwise
+            True if valid, False if invalid, None if upstream could not be
+            reached (timeout, open circuit breaker, full request queue)
         """
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            return bool(info and 'symbol' in info)
-        except Exception:
-            return False
+            rate_limiter = get_rate_limiter()
+            info = await rate_limiter.fetch_stock_info(symbol)
+        except Exception as e:
+            logger.warning(f"Could not validate {symbol}: {e}")
+            return None
+
+        if info is None:
+            return None
+        return 'symbol' in info
+
+
+# Exchange-less display names for index constituents, used when info is unavailable
+_FALLBACK_NAMES = {
+    symbol: symbol.replace('.NS', '').replace('.BO', '')
+    for symbols in StockService.INDICES.values()
+    for symbol in symbols
+}
@@ -1,14 +1,37 @@
 import yfinance as yf
 import asyncio
+import concurrent.futures
+import json
 import time
 import logging
 import os
-from typing import Optional, Dict, List, Any
+import random
+import re
+from typing import Optional, Dict, List, Any, Tuple
 from datetime import datetime, timedelta
 from enum import Enum
+from cachetools import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# Rate limiting or JSON parsing errors (which happen after a 429)
+_RATE_LIMIT_RE = re.compile(r"429|too many requests|expecting value", re.IGNORECASE)
+
+# Fields of Ticker.info read anywhere in the backend (StockService._format_stock_info,
+# search results, symbol validation); the rest of the ~200 fields are dropped
+_INFO_FIELDS = (
+    "symbol", "longName", "shortName", "exchange", "quoteType",
+    "sector", "industry", "marketCap", "currentPrice", "regularMarketPrice",
+    "previousClose", "dayHigh", "dayLow", "volume", "averageVolume",
+)
+
+
+def _trim_info(info: Optional[Dict]) -> Optional[Dict]:
+    """Keep only the used fields of a valid Ticker.info (others pass through unchanged)"""
+    if not info or "symbol" not in info:
+        return info
+    return {field: info[field] for field in _INFO_FIELDS if field in info}
+
 
 class CircuitState(Enum):
     CLOSED = "closed"  # Normal operation
@@ -34,31 +57,44 @@ class YFinanceRateLimiter:
         self.requests_per_minute = int(os.getenv("YFINANCE_REQUESTS_PER_MINUTE", "10"))
         self.max_concurrent = int(os.getenv("YFINANCE_MAX_CONCURRENT", "2"))
         self.cache_ttl = int(os.getenv("YFINANCE_CACHE_TTL", "300"))  # 5 minutes
+        self.cache_max_size = int(os.getenv("YFINANCE_CACHE_MAX_SIZE", "2048"))
+        # Room for a full index fetch (nifty50) plus interactive requests
+        self.queue_max_size = int(os.getenv("YFINANCE_QUEUE_MAX", "100"))
+        # yf.download makes one upstream call per ticker, so batches stay small
+        self.download_batch_size = int(os.getenv("YFINANCE_DOWNLOAD_BATCH_SIZE", "5"))
         self.circuit_breaker_threshold = int(os.getenv("YFINANCE_CIRCUIT_BREAKER_THRESHOLD", "5"))
         self.circuit_breaker_timeout = int(os.getenv("YFINANCE_CIRCUIT_BREAKER_TIMEOUT", "300"))  # 5 minutes
 
-        # Token bucket
+        # Token bucket (timestamps here use the monotonic clock, immune to
+        # wall-clock adjustments)
         # Start with 1 token to allow first request immediately, then enforce rate limiting
         self.tokens = 1.0
         self.max_tokens = float(self.requests_per_minute)
         self.refill_rate = self.requests_per_minute / 60.0  # tokens per second
-        self.last_refill = time.time()
+        self.last_refill = time.monotonic()
 
-        # Request queue
-        self.request_queue = asyncio.Queue()
+        # Earliest time the next request may start (mandatory post-request delay)
+        self.cooldown_until = 0.0
+
+        # Requests hold this lock while they wait for a token and run, so
+        # upstream calls happen one at a time in FIFO order
+        self._serial_lock = asyncio.Lock()
+        self.pending_requests = 0  # submitted and not yet finished
         self.active_requests = 0
 
-        # Cache for deduplication
-        self.cache: Dict[str, tuple[Any, float]] = {}  # {cache_key: (result, expiry_time)}
+        # Cache for deduplication (LRU-bounded; expired entries purged on write)
+        self.cache: TTLCache = TTLCache(maxsize=self.cache_max_size, ttl=self.cache_ttl)
+
+        # Queued/running requests by cache key, shared by concurrent callers
+        self.in_flight: Dict[Tuple[str, ...], asyncio.Future] = {}
 
         # Circuit breaker
         self.circuit_state = CircuitState.CLOSED
         self.consecutive_failures = 0
         self.circuit_opened_at: Optional[float] = None
 
-        # Background task
-        self.processor_task: Optional[asyncio.Task] = None
-        self.is_running = False
+        # Requests run one at a time, so a single persistent worker thread
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
 
         logger.info(
             f"YFinance Rate Limiter initialized: "
@@ -68,26 +104,27 @@ class YFinanceRateLimiter:
         )
 
     async def start(self):
-        """Start the background queue processor"""
-        if not self.is_running:
-            self.is_running = True
-            self.processor_task = asyncio.create_task(self._process_queue())
+        """Start the worker thread used for yfinance calls"""
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="yfinance"
+            )
             logger.info("YFinance Rate Limiter started")
 
     async def stop(self):
-        """Stop the background queue processor"""
-        self.is_running = False
-        if self.processor_task:
-            self.processor_task.cancel()
-            try:
-                await self.processor_task
-            except asyncio.CancelledError:
-                pass
+        """Cancel pending requests and stop the worker thread"""
+        pending = list(self.in_flight.values())
+        for request in pending:
+            request.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
         logger.info("YFinance Rate Limiter stopped")
 
     def _refill_tokens(self):
         """Refill token bucket based on elapsed time"""
-        now = time.time()
+        now = time.monotonic()
         elapsed = now - self.last_refill
 
         # Add tokens based on elapsed time
@@ -107,7 +144,7 @@ class YFinanceRateLimiter:
 
         if self.circuit_state == CircuitState.OPEN:
             # Check if timeout has elapsed
-            if self.circuit_opened_at and (time.time() - self.circuit_opened_at) > self.circuit_breaker_timeout:
+            if self.circuit_opened_at and (time.monotonic() - self.circuit_opened_at) > self.circuit_breaker_timeout:
                 logger.info("Circuit breaker timeout elapsed, moving to HALF_OPEN state")
                 self.circuit_state = CircuitState.HALF_OPEN
                 self.consecutive_failures = 0
@@ -115,7 +152,9 @@ class YFinanceRateLimiter:
             return False
 
         if self.circuit_state == CircuitState.HALF_OPEN:
-            # Allow a few test requests
+            # Requests run one at a time under _serial_lock, so HALF_OPEN
+            # already admits a single probe; its outcome closes or reopens
+            # the breaker before the next request checks it
             return True
 
         return False
@@ -135,87 +174,219 @@ class YFinanceRateLimiter:
                 f"Rate limit error count: {self.consecutive_failures}/{self.circuit_breaker_threshold}"
             )
 
-            if self.consecutive_failures >= self.circuit_breaker_threshold:
+            if self.circuit_state == CircuitState.HALF_OPEN:
+                # The probe was rate limited; the service has not recovered
+                logger.error("Circuit breaker re-OPENING after failed HALF_OPEN probe")
+                self.circuit_state = CircuitState.OPEN
+                self.circuit_opened_at = time.monotonic()
+            elif self.consecutive_failures >= self.circuit_breaker_threshold:
                 logger.error(f"Circuit breaker OPENING due to {self.consecutive_failures} consecutive 429 errors")
                 self.circuit_state = CircuitState.OPEN
-                self.circuit_opened_at = time.time()
-
-    def _get_cache_key(self, request_type: str, identifier: str) -> str:
-        """Generate cache key for request deduplication"""
-        return f"{request_type}:{identifier}"
-
-    def _get_cached(self, cache_key: str) -> Optional[Any]:
-        """Get cached result if not expired"""
-        if cache_key in self.cache:
-            result, expiry = self.cache[cache_key]
-            if time.time() < expiry:
-                logger.debug(f"Cache hit for {cache_key}")
-                return result
-            else:
-                # Expired, remove from cache
-                del self.cache[cache_key]
-        return None
+                self.circuit_opened_at = time.monotonic()
+
+    def _get_cache_key(self, request_type: str, *identifier: str) -> Tuple[str, ...]:
+        """Generate cache key for request deduplication (a tuple, no string building)"""
+        return (request_type, *identifier)
+
+    def _get_cached(self, cache_key: Tuple[str, ...]) -> Optional[Any]:
+        """Get cached result if not expired (TTLCache already drops stale entries)"""
+        return self.cache.get(cache_key)
 
-    def _set_cache(self, cache_key: str, result: Any):
+    def _set_cache(self, cache_key: Tuple[str, ...], result: Any):
         """Store result in cache"""
-        expiry = time.time() + self.cache_ttl
-        self.cache[cache_key] = (result, expiry)
-        logger.debug(f"Cached result for {cache_key}")
+        self.cache[cache_key] = result
+        # Lazy formatting: this runs for every fetched result
+        logger.debug("Cached result for %s", cache_key)
+
+    def _enqueue(
+        self,
+        cache_key: Tuple[str, ...],
+        fetch_func,
+        cost: int = 1,
+        retry_empty: bool = True
+    ) -> asyncio.Future:
+        """
+        Submit a request, or join the identical one already waiting or running
+
+        Callers should await the returned future through asyncio.shield so a
+        timeout in one caller does not cancel it for the others. If
+        queue_max_size requests are already pending the future resolves to None.
+
+        Args:
+            cache_key: Cache key identifying the request
+            fetch_func: Function to execute (synchronous)
+            cost: Tokens to charge, one per upstream call fetch_func makes
+            retry_empty: Whether an empty result is retried (see _execute_request)
+
+        Returns:
+            Future resolved with the request's result
+        """
+        request = self.in_flight.get(cache_key)
+        if request is not None:
+            logger.debug(f"Joining in-flight request for {cache_key}")
+            return request
+
+        if self.pending_requests >= self.queue_max_size:
+            # Shed load rather than letting callers pile up behind the lock
+            logger.warning(
+                f"Request queue full ({self.queue_max_size}), dropping request for {cache_key}"
+            )
+            request = asyncio.get_running_loop().create_future()
+            request.set_result(None)
+            return request
+
+        request = asyncio.create_task(self._run(fetch_func, cost, retry_empty))
+        self.in_flight[cache_key] = request
+        self.pending_requests += 1
 
-    async def _wait_for_token(self):
-        """Wait until a token is available"""
-        while self.tokens < 1.0:
+        def done(_):
+            self.in_flight.pop(cache_key, None)
+            self.pending_requests -= 1
+
+        request.add_done_callback(done)
+        return request
+
+    async def _run(self, fetch_func, cost: int = 1, retry_empty: bool = True) -> Optional[Any]:
+        """
+        Run a request once the circuit breaker and token bucket allow it
+
+        Args:
+            fetch_func: Function to execute (synchronous)
+            cost: Tokens to charge (capped at the bucket size)
+            retry_empty: Whether an empty result is retried (see _execute_request)
+
+        Returns:
+            Result from fetch_func or None on failure
+        """
+        async with self._serial_lock:
+            while not self._check_circuit_breaker():
+                # Sleep until the breaker is due to move to HALF_OPEN
+                wait = (self.circuit_opened_at or 0) + self.circuit_breaker_timeout - time.monotonic()
+                logger.warning(f"Circuit breaker OPEN, waiting {max(wait, 0):.0f}s before processing requests...")
+                await asyncio.sleep(max(wait, 0.1))
+
+            cost = min(float(cost), self.max_tokens)
+            await self._wait_for_token(cost)
+
+            # Consume one token per upstream call
+            self.tokens -= cost
+            self.active_requests += 1
+
+            try:
+                return await self._execute_request(fetch_func, retry_empty=retry_empty)
+            finally:
+                self.active_requests -= 1
+                # Mandatory 3-second delay after each request to respect Yahoo Finance limits
+                # Yahoo Finance has strict rate limits; being conservative prevents 429 errors.
+                # Enforced in _wait_for_token so it overlaps with the token wait.
+                self.cooldown_until = time.monotonic() + 3.0
+
+    def _cache_info(self, symbol: str, info: Dict):
+        """Cache an info result under the requested symbol and the one Yahoo reports"""
+        self._set_cache(self._get_cache_key("info", symbol), info)
+        canonical = info.get('symbol')
+        if canonical and canonical != symbol:
+            self._set_cache(self._get_cache_key("info", canonical), info)
+
+    async def _wait_for_token(self, cost: float = 1.0):
+        """Wait until the post-request cooldown has passed and cost tokens are available"""
+        # Tokens keep refilling during the cooldown, so the two waits overlap
+        cooldown = self.cooldown_until - time.monotonic()
+        if cooldown > 0:
+            await asyncio.sleep(cooldown)
+
+        # Fast path: a token is already banked. Skipping the refill loses
+        # nothing, since the next refill counts from last_refill
+        if self.tokens >= cost:
+            return
+
+        self._refill_tokens()
+        while self.tokens < cost:
+            # Only the lock holder consumes tokens, so sleep exactly until
+            # enough tokens are due (the loop only guards float rounding)
+            wait_time = (cost - self.tokens) / self.refill_rate
+            await asyncio.sleep(wait_time)
             self._refill_tokens()
-            if self.tokens < 1.0:
-                # Calculate wait time for next token
-                wait_time = (1.0 - self.tokens) / self.refill_rate
-                await asyncio.sleep(min(wait_time, 1.0))  # Sleep max 1 second at a time
 
-    async def _execute_request(self, fetch_func, max_retries: int = 3) -> Optional[Any]:
+    @staticmethod
+    def _is_rate_limit_error(error: Exception) -> bool:
+        """Whether an exception from yfinance indicates rate limiting"""
+        # HTTP errors carry the response; an empty body after a 429 fails JSON decoding
+        status = getattr(getattr(error, "response", None), "status_code", None)
+        if status == 429 or isinstance(error, json.JSONDecodeError):
+            return True
+        # yfinance also re-raises some failures as plain messages
+        return _RATE_LIMIT_RE.search(str(error)) is not None
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Exponential backoff (10s, 20s, 40s caps) with full jitter, at least 1s"""
+        return max(1.0, random.uniform(0, 10 * (2 ** attempt)))
+
+    @staticmethod
+    def _has_data(result: Any) -> bool:
+        """Whether a yfinance result is non-empty (DataFrames have no truth value)"""
+        empty = getattr(result, "empty", None)
+        if isinstance(empty, bool):
+            return not empty
+        return bool(result)
+
+    async def _execute_request(
+        self,
+        fetch_func,
+        max_retries: int = 3,
+        retry_empty: bool = True
+    ) -> Optional[Any]:
         """
         Execute a request with retry logic
 
         Args:
             fetch_func: Function to execute (synchronous)
             max_retries: Maximum retry attempts
+            retry_empty: Retry empty results (which may be silent rate limiting);
+                when False an empty result is returned as-is, neither retried
+                nor counted as a success
 
         Returns:
             Result from fetch_func or None on failure
         """
         for attempt in range(max_retries):
             try:
-                # Execute the synchronous yfinance call
-                result = await asyncio.to_thread(fetch_func)
+                # Execute the synchronous yfinance call on the worker thread
+                result = await asyncio.get_running_loop().run_in_executor(self._executor, fetch_func)
 
-                # Success - check if result is valid
-                if result:
+                # Success - check if result is valid (DataFrames are checked via .empty)
+                if self._has_data(result):
                     self._record_success()
                     return result
+                elif not retry_empty:
+                    return result
                 else:
                     # Empty result, might be rate limited without exception
                     logger.warning(f"Empty result from yfinance on attempt {attempt + 1}/{max_retries}")
                     if attempt < max_retries - 1:
-                        backoff = 10 * (2 ** attempt)
-                        await asyncio.sleep(backoff)
+                        await asyncio.sleep(self._backoff(attempt))
                         continue
                     return None
 
             except Exception as e:
-                error_str = str(e).lower()
                 # Check for rate limiting or JSON parsing errors (which happen after 429)
-                is_rate_limit = ('429' in error_str or
-                                'too many requests' in error_str or
-                                'expecting value' in error_str)
+                is_rate_limit = self._is_rate_limit_error(e)
 
                 if is_rate_limit:
                     self._record_failure(is_rate_limit=True)
 
+                    if self.circuit_state == CircuitState.OPEN:
+                        # Don't keep retrying against a tripped breaker
+                        logger.error("Circuit breaker open, abandoning request")
+                        return None
+
                     if attempt < max_retries - 1:
-                        # Exponential backoff: 10s, 20s, 40s
-                        backoff = 10 * (2 ** attempt)
+                        # Jittered exponential backoff so workers don't retry in lockstep
+                        backoff = self._backoff(attempt)
                         logger.warning(
                             f"Rate limit hit, retry {attempt + 1}/{max_retries} "
-                            f"after {backoff}s backoff"
+                            f"after {backoff:.1f}s backoff"
                         )
                         await asyncio.sleep(backoff)
                         continue
@@ -229,71 +400,62 @@ class YFinanceRateLimiter:
 
         return None
 
-    async def _process_queue(self):
-        """Background task to process queued requests sequentially"""
-        logger.info("Queue processor started (sequential mode)")
-
-        while self.is_running:
-            try:
-                # Check circuit breaker
-                if not self._check_circuit_breaker():
-                    logger.warning("Circuit breaker OPEN, waiting before processing requests...")
-                    await asyncio.sleep(10)  # Wait 10s before checking again
-                    continue
+    async def fetch_stock_info(self, symbol: str) -> Optional[Dict]:
+        """
+        Fetch stock information with rate limiting
 
-                # Wait for a token
-                await self._wait_for_token()
+        Args:
+            symbol: Stock symbol (e.g., "RELIANCE.NS")
 
-                # Get request from queue (with timeout to allow loop to continue)
-                try:
-                    request_future, fetch_func = await asyncio.wait_for(
-                        self.request_queue.get(),
-                        timeout=1.0
-                    )
-                except asyncio.TimeoutError:
-                    continue
+        Returns:
+            Stock info dict or None
+        """
+        # Check cache first
+        cache_key = self._get_cache_key("info", symbol)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
 
-                # Consume a token
-                self.tokens -= 1.0
-                self.active_requests += 1
+        # Create fetch function
+        def fetch():
+            ticker = yf.Ticker(symbol)
+            # Trim in the worker thread so the full dict is never retained
+            return _trim_info(ticker.info)
 
-                # Execute request and WAIT for it to complete before processing next
-                # This ensures strict sequential processing
-                await self._execute_and_respond(request_future, fetch_func)
+        # Queue the request; allow extra time for requests already ahead of it
+        # since the queue is processed one request at a time
+        queued_ahead = self.pending_requests
+        request_future = self._enqueue(cache_key, fetch)
 
-            except Exception as e:
-                logger.error(f"Error in queue processor: {e}", exc_info=True)
-                await asyncio.sleep(1)
+        # Wait for result
+        try:
+            result = await asyncio.wait_for(
+                asyncio.shield(request_future),
+                timeout=120 + queued_ahead * 5  # 2 minutes plus ~5s per queued request
+            )
 
-        logger.info("Queue processor stopped")
+            if result:
+                self._cache_info(symbol, result)
 
-    async def _execute_and_respond(self, request_future: asyncio.Future, fetch_func):
-        """Execute request and set result on future"""
-        try:
-            result = await self._execute_request(fetch_func)
-            if not request_future.done():
-                request_future.set_result(result)
-        except Exception as e:
-            if not request_future.done():
-                request_future.set_exception(e)
-        finally:
-            self.active_requests -= 1
-            # Mandatory 3-second delay after each request to respect Yahoo Finance limits
-            # Yahoo Finance has strict rate limits; being conservative prevents 429 errors
-            await asyncio.sleep(3.0)
+            return result
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout waiting for stock info: {symbol}")
+            return None
 
-    async def fetch_stock_info(self, symbol: str) -> Optional[Dict]:
+    async def fetch_historical(self, symbol: str, period: str, interval: str) -> Optional[Any]:
         """
-        Fetch stock information with rate limiting
+        Fetch historical price data with rate limiting
 
         Args:
             symbol: Stock symbol (e.g., "RELIANCE.NS")
+            period: Time period (1d, 5d, 1mo, ...)
+            interval: Data interval (1m, 1h, 1d, ...)
 
         Returns:
-            Stock info dict or None
+            Non-empty pandas DataFrame of OHLCV rows or None
         """
         # Check cache first
-        cache_key = self._get_cache_key("info", symbol)
+        cache_key = self._get_cache_key("history", symbol, period, interval)
         cached = self._get_cached(cache_key)
         if cached is not None:
             return cached
@@ -301,22 +463,93 @@ class YFinanceRateLimiter:
         # Create fetch function
         def fetch():
             ticker = yf.Ticker(symbol)
-            return ticker.info
+            return ticker.history(period=period, interval=interval)
 
-        # Queue the request
-        request_future = asyncio.Future()
-        await self.request_queue.put((request_future, fetch))
+        # Queue the request; allow extra time for requests already ahead of it
+        queued_ahead = self.pending_requests
+        request_future = self._enqueue(cache_key, fetch)
 
         # Wait for result
         try:
-            result = await asyncio.wait_for(request_future, timeout=120)  # 2 minute timeout
+            result = await asyncio.wait_for(
+                asyncio.shield(request_future),
+                timeout=120 + queued_ahead * 5  # 2 minutes plus ~5s per queued request
+            )
 
-            if result:
+            if result is not None:
                 self._set_cache(cache_key, result)
 
             return result
         except asyncio.TimeoutError:
-            logger.error(f"Timeout waiting for stock info: {symbol}")
+            logger.error(f"Timeout waiting for historical data: {symbol}")
+            return None
+
+    async def fetch_download(self, symbols: List[str], period: str = "5d") -> Optional[Tuple[Any, Dict[str, str]]]:
+        """
+        Download recent prices for a few symbols in one rate-limited request
+
+        yf.download fetches each ticker separately, so the request is charged
+        one token per symbol and at most download_batch_size symbols are
+        accepted; callers split longer lists into batches. It does not raise
+        for individual tickers but records their errors instead. Rate-limit
+        errors among them are raised so retries and the circuit breaker see
+        them; the rest are returned to the caller.
+
+        Args:
+            symbols: Stock symbols (e.g., ["RELIANCE.NS", "TCS.NS"])
+            period: Time period (1d, 5d, 1mo, ...)
+
+        Returns:
+            (DataFrame, {TICKER: error}) or None if the download failed. The
+            DataFrame has ticker-grouped columns (upper-cased tickers) when
+            several symbols are given
+
+        Raises:
+            ValueError: If more than download_batch_size symbols are given
+        """
+        symbols = list(symbols)
+        if len(symbols) > self.download_batch_size:
+            raise ValueError(
+                f"At most {self.download_batch_size} symbols per download, got {len(symbols)}"
+            )
+
+        # Check cache first
+        cache_key = self._get_cache_key("download", period, *sorted(symbols))
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
+
+        # Create fetch function (threads=False: the limiter paces every call)
+        def fetch():
+            data = yf.download(
+                symbols,
+                period=period,
+                progress=False,
+                group_by="ticker",
+                threads=False
+            )
+            errors = dict(getattr(yf.shared, "_ERRORS", {}))
+            for ticker, error in errors.items():
+                if self._is_rate_limit_error(RuntimeError(error)):
+                    raise RuntimeError(f"Rate limited downloading {ticker}: {error}")
+            return data, errors
+
+        queued_ahead = self.pending_requests
+        request_future = self._enqueue(cache_key, fetch, cost=len(symbols))
+
+        # Wait for result; the request itself may wait for several tokens
+        try:
+            result = await asyncio.wait_for(
+                asyncio.shield(request_future),
+                timeout=120 + queued_ahead * 5 + len(symbols) / self.refill_rate
+            )
+
+            if result is not None:
+                self._set_cache(cache_key, result)
+
+            return result
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout waiting for download of {len(symbols)} symbols")
             return None
 
     async def fetch_stock_search(self, query: str) -> List[Dict[str, str]]:
@@ -342,37 +575,70 @@ class YFinanceRateLimiter:
             f"{query.upper()}.BO"
         ]
 
-        results = []
-        seen_symbols = set()
-
-        for symbol in symbols_to_try:
-            # Create fetch function
-            def fetch(sym=symbol):
-                ticker = yf.Ticker(sym)
-                return ticker.info
+        # Reuse info already fetched for any variation (e.g. by /stocks/{symbol}/info)
+        prefetched = {
+            sym: self._get_cached(self._get_cache_key("info", sym)) for sym in symbols_to_try
+        }
+        missing = [sym for sym, info in prefetched.items() if info is None]
 
-            # Queue the request
-            request_future = asyncio.Future()
-            await self.request_queue.put((request_future, fetch))
+        # Look up the remaining variations in one queued request, so a search
+        # pays a single post-request delay; it is still charged one token per
+        # variation since each is a separate upstream call
+        def fetch():
+            infos = []
+            last_error = None
+            for sym in missing:
+                try:
+                    info = _trim_info(yf.Ticker(sym).info)
+                except Exception as e:
+                    logger.debug(f"Error fetching {sym} during search: {e}")
+                    last_error = e
+                    continue
+                if info and 'symbol' in info:
+                    infos.append((sym, info))
+            # Surface the error (e.g. a 429) for retry handling if nothing worked
+            if last_error is not None and not infos:
+                raise last_error
+            return infos
+
+        fetched = {}
+        if missing:
+            queued_ahead = self.pending_requests
+            # Only variations that returned info count; finding none is a
+            # normal "no match" answer, so it is neither retried nor a success
+            request_future = self._enqueue(
+                cache_key, fetch, cost=len(missing), retry_empty=False
+            )
 
-            # Wait for result
+            # Wait for result; the request itself may wait for several tokens
             try:
-                info = await asyncio.wait_for(request_future, timeout=60)
-
-                if info and 'symbol' in info:
-                    symbol_key = info.get('symbol', symbol)
-
-                    if symbol_key not in seen_symbols:
-                        seen_symbols.add(symbol_key)
-                        results.append({
-                            "symbol": symbol_key,
-                            "name": info.get('longName', info.get('shortName', 'N/A')),
-                            "exchange": info.get('exchange', 'NSE'),
-                            "type": info.get('quoteType', 'EQUITY')
-                        })
+                fetched = dict(await asyncio.wait_for(
+                    asyncio.shield(request_future),
+                    timeout=120 + queued_ahead * 5 + len(missing) / self.refill_rate
+                ) or ())
             except (asyncio.TimeoutError, Exception) as e:
-                logger.debug(f"Error fetching {symbol} during search: {e}")
-                continue
+                logger.debug(f"Error searching for {query}: {e}")
+
+        results = []
+        seen_symbols = set()
+
+        for symbol in symbols_to_try:
+            info = prefetched[symbol] or fetched.get(symbol)
+            if info and 'symbol' in info:
+                symbol_key = info.get('symbol', symbol)
+
+                # Later info lookups for this symbol can skip the upstream call
+                if prefetched[symbol] is None:
+                    self._cache_info(symbol, info)
+
+                if symbol_key not in seen_symbols:
+                    seen_symbols.add(symbol_key)
+                    results.append({
+                        "symbol": symbol_key,
+                        "name": info.get('longName', info.get('shortName', 'N/A')),
+                        "exchange": info.get('exchange', 'NSE'),
+                        "type": info.get('quoteType', 'EQUITY')
+                    })
 
         # Cache results
         if results:
@@ -0,0 +1,19 @@
+import os
+
+# Settings are read at import time; tokens need a signing key
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import fakeredis.aioredis
+import pytest
+
+from app.services.cache_service import CacheService
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    """In-memory Redis behind CacheService, with an empty local cache"""
+    client = fakeredis.aioredis.FakeRedis()
+    monkeypatch.setattr(CacheService, "_redis_client", client)
+    CacheService._local.clear()
+    yield client
+    CacheService._local.clear()
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from app.services.cache_service import CacheService
+
+
+def counting_loader(value, delay=0.0):
+    """Loader returning value after delay, counting its calls in .calls"""
+    async def loader():
+        loader.calls += 1
+        await asyncio.sleep(delay)
+        return value
+    loader.calls = 0
+    return loader
+
+
+@pytest.mark.asyncio
+async def test_get_or_set_loads_once_for_concurrent_callers(redis_client):
+    loader = counting_loader({"v": 1}, delay=0.1)
+
+    results = await asyncio.gather(*(
+        CacheService.get_or_set("key", loader, ttl=60) for _ in range(5)
+    ))
+
+    assert results == [{"v": 1}] * 5
+    assert loader.calls == 1
+    assert await redis_client.exists("lock:key") == 0
+    assert 0 < await redis_client.ttl("key") <= 60
+
+
+@pytest.mark.asyncio
+async def test_get_or_set_waiter_returns_value_stored_by_lock_holder(redis_client):
+    loader = counting_loader("mine")
+    await redis_client.set("lock:key", "1", px=2000)
+
+    async def other_worker():
+        await asyncio.sleep(0.1)
+        await CacheService.set("key", "theirs")
+
+    _, result = await asyncio.gather(
+        other_worker(), CacheService.get_or_set("key", loader, lock_timeout_ms=2000)
+    )
+
+    assert result == "theirs"
+    assert loader.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_get_or_set_waiter_loads_itself_after_lock_times_out(redis_client):
+    loader = counting_loader("mine")
+    await redis_client.set("lock:key", "1", px=200)
+
+    assert await CacheService.get_or_set("key", loader, lock_timeout_ms=200) == "mine"
+    assert loader.calls == 1
+    assert await CacheService.get("key") == "mine"
+
+
+@pytest.mark.asyncio
+async def test_get_or_set_releases_lock_when_loader_fails(redis_client):
+    async def loader():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        await CacheService.get_or_set("key", loader)
+
+    assert await redis_client.exists("lock:key") == 0
+
+
+@pytest.mark.asyncio
+async def test_get_or_set_does_not_cache_falsy_values(redis_client):
+    assert await CacheService.get_or_set("key", counting_loader([])) == []
+    assert await redis_client.exists("key", "lock:key") == 0
+
+
+@pytest.mark.asyncio
+async def test_local_cache_skips_keys_expiring_before_it(redis_client):
+    await CacheService.set("short", {"v": 1}, ttl=10)
+    await CacheService.set("long", {"v": 2}, ttl=600)
+    CacheService._local.clear()
+
+    assert await CacheService.mget(["short", "long", "missing"]) == [{"v": 1}, {"v": 2}, None]
+    assert set(CacheService._local) == {"long"}
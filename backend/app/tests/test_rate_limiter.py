@@ -0,0 +1,149 @@
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+
+from app.services import yfinance_rate_limiter
+from app.services.yfinance_rate_limiter import CircuitState, YFinanceRateLimiter
+
+
+class FakeTicker:
+    """yf.Ticker stand-in serving .info from a dict of known symbols"""
+
+    known = {}
+    calls = []
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    @property
+    def info(self):
+        FakeTicker.calls.append(self.symbol)
+        return FakeTicker.known.get(self.symbol, {"trailingPegRatio": None})
+
+
+@pytest_asyncio.fixture
+async def limiter(monkeypatch):
+    monkeypatch.setenv("YFINANCE_REQUESTS_PER_MINUTE", "6000")
+    monkeypatch.setattr(yfinance_rate_limiter.yf, "Ticker", FakeTicker)
+    FakeTicker.known = {}
+    FakeTicker.calls = []
+    rate_limiter = YFinanceRateLimiter()
+    # No mandatory delay between requests in tests
+    rate_limiter.tokens = rate_limiter.max_tokens
+    await rate_limiter.start()
+    yield rate_limiter
+    await rate_limiter.stop()
+
+
+@pytest.mark.asyncio
+async def test_search_charges_one_token_per_variation(limiter):
+    FakeTicker.known = {"TCS.NS": {"symbol": "TCS.NS", "longName": "Tata Consultancy"}}
+    tokens = limiter.tokens
+
+    results = await limiter.fetch_stock_search("tcs")
+
+    assert results == [
+        {"symbol": "TCS.NS", "name": "Tata Consultancy", "exchange": "NSE", "type": "EQUITY"}
+    ]
+    assert FakeTicker.calls == ["TCS", "TCS.NS", "TCS.BO"]
+    assert tokens - limiter.tokens == pytest.approx(3, abs=0.5)
+
+
+@pytest.mark.asyncio
+async def test_search_without_matches_does_not_close_half_open_breaker(limiter):
+    limiter.circuit_state = CircuitState.HALF_OPEN
+
+    assert await limiter.fetch_stock_search("nosuchstock") == []
+    assert limiter.circuit_state == CircuitState.HALF_OPEN
+    # Not retried: each variation was looked up once
+    assert len(FakeTicker.calls) == 3
+
+    FakeTicker.known = {"INFY.NS": {"symbol": "INFY.NS", "longName": "Infosys"}}
+    limiter.cooldown_until = 0.0
+    assert await limiter.fetch_stock_search("infy")
+    assert limiter.circuit_state == CircuitState.CLOSED
+
+
+def rate_limited():
+    raise RuntimeError("429 Client Error: Too Many Requests")
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_after_consecutive_rate_limit_errors(limiter):
+    for _ in range(limiter.circuit_breaker_threshold - 1):
+        limiter._record_failure(is_rate_limit=True)
+    assert limiter.circuit_state == CircuitState.CLOSED
+
+    # Other errors don't count towards the threshold
+    limiter._record_failure(is_rate_limit=False)
+    assert limiter.circuit_state == CircuitState.CLOSED
+
+    limiter._record_failure(is_rate_limit=True)
+    assert limiter.circuit_state == CircuitState.OPEN
+    assert not limiter._check_circuit_breaker()
+
+
+@pytest.mark.asyncio
+async def test_breaker_half_opens_after_timeout(limiter):
+    limiter.circuit_state = CircuitState.OPEN
+    limiter.circuit_opened_at = time.monotonic() - limiter.circuit_breaker_timeout - 1
+    limiter.consecutive_failures = limiter.circuit_breaker_threshold
+
+    assert limiter._check_circuit_breaker()
+    assert limiter.circuit_state == CircuitState.HALF_OPEN
+    assert limiter.consecutive_failures == 0
+
+
+@pytest.mark.asyncio
+async def test_half_open_probe_success_closes_breaker(limiter):
+    limiter.circuit_state = CircuitState.HALF_OPEN
+
+    assert await limiter._execute_request(lambda: {"symbol": "TCS.NS"}) == {"symbol": "TCS.NS"}
+    assert limiter.circuit_state == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_half_open_probe_rate_limited_reopens_breaker(limiter):
+    limiter.circuit_state = CircuitState.HALF_OPEN
+
+    # Abandoned at once instead of retrying against the reopened breaker
+    assert await limiter._execute_request(rate_limited) is None
+    assert limiter.circuit_state == CircuitState.OPEN
+    assert limiter.circuit_opened_at is not None
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_errors_are_retried(limiter, monkeypatch):
+    monkeypatch.setattr(limiter, "_backoff", lambda attempt: 0)
+    attempts = []
+
+    def fetch():
+        attempts.append(1)
+        if len(attempts) < 3:
+            rate_limited()
+        return {"symbol": "TCS.NS"}
+
+    assert await limiter._execute_request(fetch) == {"symbol": "TCS.NS"}
+    assert len(attempts) == 3
+    assert limiter.consecutive_failures == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_upstream_call(limiter):
+    FakeTicker.known = {"TCS.NS": {"symbol": "TCS.NS", "longName": "Tata Consultancy"}}
+
+    results = await asyncio.gather(*(limiter.fetch_stock_info("TCS.NS") for _ in range(3)))
+
+    assert results == [{"symbol": "TCS.NS", "longName": "Tata Consultancy"}] * 3
+    assert FakeTicker.calls == ["TCS.NS"]
+    assert limiter.in_flight == {}
+
+
+@pytest.mark.asyncio
+async def test_full_queue_sheds_new_requests(limiter):
+    limiter.queue_max_size = 0
+
+    assert await limiter.fetch_stock_info("TCS.NS") is None
+    assert FakeTicker.calls == []
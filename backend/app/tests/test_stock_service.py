@@ -0,0 +1,111 @@
+import pandas as pd
+import pytest
+
+from app.services import stock_service
+from app.services.cache_service import CacheService
+from app.services.stock_service import StockService
+
+
+class FakeRateLimiter:
+    """Serves canned yf.download results and records the requested batches"""
+
+    download_batch_size = 5
+
+    def __init__(self, data=None, errors=None, fail=False):
+        self.data = data
+        self.errors = errors or {}
+        self.fail = fail
+        self.batches = []
+
+    async def fetch_download(self, symbols, period="5d"):
+        self.batches.append(list(symbols))
+        if self.fail:
+            return None
+        return self.data, self.errors
+
+
+def grouped_frame(tickers_with_data, tickers_without_data=()):
+    """A group_by="ticker" download frame (yfinance upper-cases the tickers)"""
+    index = pd.date_range("2024-01-01", periods=2)
+    frames = {
+        ticker: pd.DataFrame({"Close": [1.0, 2.0]}, index=index)
+        for ticker in tickers_with_data
+    }
+    frames.update({
+        ticker: pd.DataFrame({"Close": [float("nan")] * 2}, index=index)
+        for ticker in tickers_without_data
+    })
+    return pd.concat(frames, axis=1)
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    def install(**kwargs):
+        fake = FakeRateLimiter(**kwargs)
+        monkeypatch.setattr(stock_service, "get_rate_limiter", lambda: fake)
+        return fake
+    return install
+
+
+@pytest.mark.asyncio
+async def test_validate_symbols_matches_mixed_case_symbols(redis_client, limiter):
+    limiter(data=grouped_frame(["RELIANCE.NS", "TCS.NS"]))
+
+    result = await StockService.validate_symbols(["reliance.NS", "TCS.NS"])
+
+    assert result == {"reliance.NS": True, "TCS.NS": True}
+    cached = await CacheService.get(CacheService.make_stock_key("reliance.NS", "valid"))
+    assert cached == {"valid": True}
+
+
+@pytest.mark.asyncio
+async def test_validate_symbols_stops_after_failed_batch(redis_client, limiter):
+    fake = limiter(fail=True)
+    symbols = [f"S{i}.NS" for i in range(12)]
+
+    result = await StockService.validate_symbols(symbols)
+
+    # Only the first batch went upstream; nothing is known, nothing cached
+    assert fake.batches == [symbols[:5]]
+    assert result == {s: None for s in symbols}
+    assert await redis_client.keys("*") == []
+
+
+@pytest.mark.asyncio
+async def test_validate_symbols_reads_errors_map(redis_client, limiter):
+    limiter(
+        data=grouped_frame(["GOOD.NS"], tickers_without_data=["GONE.NS"]),
+        errors={
+            "GONE.NS": "GONE.NS: No data found, symbol may be delisted",
+            "FLAKY.NS": "HTTPError: 500 Server Error",
+        },
+    )
+
+    result = await StockService.validate_symbols(["GOOD.NS", "GONE.NS", "FLAKY.NS"])
+
+    assert result == {"GOOD.NS": True, "GONE.NS": False, "FLAKY.NS": None}
+    # Only definite answers are cached
+    cached = await CacheService.mget([
+        CacheService.make_stock_key(s, "valid") for s in ("GOOD.NS", "GONE.NS", "FLAKY.NS")
+    ])
+    assert cached == [{"valid": True}, {"valid": False}, None]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("close, expected", [([1.0, 2.0], True), ([float("nan")] * 2, False)])
+async def test_validate_symbols_reads_flat_single_ticker_frame(redis_client, limiter, close, expected):
+    index = pd.date_range("2024-01-01", periods=2)
+    limiter(data=pd.DataFrame({"Close": close}, index=index))
+
+    assert await StockService.validate_symbols(["INFY.NS"]) == {"INFY.NS": expected}
+
+
+@pytest.mark.asyncio
+async def test_validate_symbols_skips_cached_symbols(redis_client, limiter):
+    fake = limiter(data=grouped_frame(["TCS.NS"]))
+    await CacheService.set(CacheService.make_stock_key("INFY.NS", "valid"), {"valid": False})
+
+    result = await StockService.validate_symbols(["INFY.NS", "TCS.NS", "TCS.NS"])
+
+    assert result == {"INFY.NS": False, "TCS.NS": True}
+    assert fake.batches == [["TCS.NS"]]
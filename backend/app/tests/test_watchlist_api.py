@@ -0,0 +1,155 @@
+import orjson
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from app.core.database import get_watchlists_collection
+from app.core.security import get_current_user_oid
+from app.main import app
+
+USER_OID = ObjectId()
+WATCHLIST_OID = ObjectId()
+
+
+class FakeCursor:
+    """Async aggregation cursor over canned documents"""
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield document
+
+    async def to_list(self, length):
+        return self.documents[:length]
+
+
+class FakeWatchlists:
+    """Watchlists collection stand-in recording the queries it receives"""
+
+    def __init__(self, documents=(), updated=None, exists=None):
+        self.documents = list(documents)
+        self.updated = updated
+        self.exists = exists
+        self.pipelines = []
+        self.update_filters = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return FakeCursor(self.documents)
+
+    async def find_one_and_update(self, filter, update, return_document=None):
+        self.update_filters.append(filter)
+        return self.updated
+
+    async def find_one(self, filter, projection=None):
+        return self.exists
+
+
+def projected(name):
+    """A watchlist as shaped by _WATCHLIST_PROJECTION"""
+    return {
+        "id": str(ObjectId()),
+        "user_id": str(USER_OID),
+        "name": name,
+        "description": None,
+        "stocks": [{"symbol": "TCS.NS", "name": None, "added_at": "2024-01-01T00:00:00"}],
+        "created_at": "2024-01-01T00:00:00",
+        "updated_at": "2024-01-01T00:00:00",
+        "is_default": False,
+    }
+
+
+@pytest.fixture
+def client():
+    def install(collection):
+        app.dependency_overrides[get_current_user_oid] = lambda: USER_OID
+        app.dependency_overrides[get_watchlists_collection] = lambda: collection
+        return TestClient(app)
+
+    yield install
+    app.dependency_overrides.clear()
+
+
+def test_export_streams_one_json_line_per_watchlist(client):
+    documents = [projected("First"), projected("Second")]
+    watchlists = FakeWatchlists(documents)
+
+    response = client(watchlists).get("/api/v1/watchlists/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [orjson.loads(line) for line in response.content.splitlines()] == documents
+    assert watchlists.pipelines[0][0] == {"$match": {"user_id": USER_OID}}
+
+
+def test_list_passes_page_to_pipeline(client):
+    documents = [projected("First")]
+    watchlists = FakeWatchlists(documents)
+    http = client(watchlists)
+
+    response = http.get("/api/v1/watchlists", params={"limit": 2, "skip": 4})
+
+    assert response.status_code == 200
+    assert response.json() == documents
+    stages = watchlists.pipelines[0]
+    assert {"$skip": 4} in stages and {"$limit": 2} in stages
+    assert http.get("/api/v1/watchlists", params={"limit": 201}).status_code == 422
+
+
+def test_batch_add_dedupes_symbols_and_returns_watchlist(client):
+    updated = {
+        "_id": str(WATCHLIST_OID),
+        "user_id": str(USER_OID),
+        "name": "Banks",
+        "stocks": [
+            {"symbol": "SBIN.NS", "name": "SBI", "added_at": "2024-01-01T00:00:00"},
+            {"symbol": "PNB.NS", "name": None, "added_at": "2024-01-01T00:00:00"},
+        ],
+        "created_at": "2024-01-01T00:00:00",
+        "updated_at": "2024-01-02T00:00:00",
+    }
+    watchlists = FakeWatchlists(updated=updated)
+
+    response = client(watchlists).post(
+        f"/api/v1/watchlists/{WATCHLIST_OID}/stocks/batch",
+        json={"stocks": [
+            {"symbol": "SBIN.NS", "name": "SBI"},
+            {"symbol": "PNB.NS"},
+            {"symbol": "SBIN.NS", "name": "duplicate"},
+        ]},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["id"] == str(WATCHLIST_OID)
+    assert [s["symbol"] for s in body["stocks"]] == ["SBIN.NS", "PNB.NS"]
+    assert watchlists.update_filters == [{
+        "_id": WATCHLIST_OID,
+        "user_id": USER_OID,
+        "stocks.symbol": {"$not": {"$all": ["SBIN.NS", "PNB.NS"]}},
+    }]
+
+
+@pytest.mark.parametrize("exists, status_code", [(None, 404), ({"_id": WATCHLIST_OID}, 400)])
+def test_batch_add_without_update_reports_cause(client, exists, status_code):
+    watchlists = FakeWatchlists(updated=None, exists=exists)
+
+    response = client(watchlists).post(
+        f"/api/v1/watchlists/{WATCHLIST_OID}/stocks/batch",
+        json={"stocks": [{"symbol": "SBIN.NS"}]},
+    )
+
+    assert response.status_code == status_code
+
+
+def test_batch_add_rejects_empty_batch(client):
+    response = client(FakeWatchlists()).post(
+        f"/api/v1/watchlists/{WATCHLIST_OID}/stocks/batch", json={"stocks": []}
+    )
+
+    assert response.status_code == 422
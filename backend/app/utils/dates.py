@@ -0,0 +1,12 @@
+from datetime import datetime, timezone
+
+
+def utc_now() -> datetime:
+    """
+    Current UTC time as a naive datetime
+
+    MongoDB hands datetimes back naive (in UTC), so timestamps created here
+    are kept naive too; responses then format the same way whether a
+    document was just built or read back from the database.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,44 @@
+import functools
+import logging
+from typing import Any, Callable
+
+from fastapi.dependencies import utils as dependency_utils
+
+logger = logging.getLogger(__name__)
+
+# Per-request callable checks made by fastapi.dependencies.utils.solve_dependencies
+_INSPECTION_FUNCTIONS = ("is_coroutine_callable", "is_gen_callable", "is_async_gen_callable")
+
+
+def _cached_inspection(func: Callable[[Any], bool]) -> Callable[[Any], bool]:
+    """Wrap a callable-inspection helper with a cache keyed on the callable"""
+    cached = functools.lru_cache(maxsize=None)(func)
+
+    @functools.wraps(func)
+    def wrapper(call: Any) -> bool:
+        try:
+            return cached(call)
+        except TypeError:
+            # Unhashable callable, fall back to uncached inspection
+            return func(call)
+
+    wrapper._is_cached_inspection = True
+    return wrapper
+
+
+def install_dependency_inspection_cache():
+    """
+    Cache FastAPI's per-request dependency introspection
+
+    FastAPI 0.110 re-runs inspect.iscoroutinefunction / isgeneratorfunction on
+    every dependency of every request. Dependencies here are module-level
+    functions and security scheme instances, so the answers never change and
+    can be memoized. Safe to call more than once.
+    """
+    for name in _INSPECTION_FUNCTIONS:
+        func = getattr(dependency_utils, name, None)
+        if func is None or getattr(func, "_is_cached_inspection", False):
+            continue
+        setattr(dependency_utils, name, _cached_inspection(func))
+
+    logger.debug("FastAPI dependency inspection cache installed")
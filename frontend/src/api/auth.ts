@@ -12,8 +12,8 @@ export const authApi = {
     return response.data;
   },
 
-  logout: async (): Promise<void> => {
-    await apiClient.post('/auth/logout');
+  logout: async (refreshToken?: string | null): Promise<void> => {
+    await apiClient.post('/auth/logout', refreshToken ? { refresh_token: refreshToken } : undefined);
   },
 
   getCurrentUser: async (): Promise<User> => {
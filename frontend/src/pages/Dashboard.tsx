@@ -3,12 +3,12 @@ import { useNavigate, Link } from 'react-router-dom';
 import { authApi } from '../api/auth';
 
 export default function Dashboard() {
-  const { user, clearAuth } = useAuthStore();
+  const { user, refreshToken, clearAuth } = useAuthStore();
   const navigate = useNavigate();
 
   const handleLogout = async () => {
     try {
-      await authApi.logout();
+      await authApi.logout(refreshToken);
     } catch (error) {
       console.error('Logout error:', error);
     } finally {